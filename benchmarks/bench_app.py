@@ -0,0 +1,372 @@
+"""
+Offline load test for the Flask app: boots main.py in-process with fake talktollm,
+optimisewait, clipboard, pyautogui and pygetwindow modules, so it runs without a browser,
+VS Code or Windows. Chat requests go to the in-process fake model.
+
+Two phases run back to back while background pollers hit the polling endpoints:
+  chat   - POST /chat/completions with configurable prompt size and base64 images
+  queue  - POST /api/queue; a simulated agent answers every pasted message with a
+           /chat/completions request, so each task runs the full queue round trip
+Per-route latency percentiles, requests per second and memory use are printed and,
+with --output, saved as JSON; --compare prints the change against an earlier run.
+
+Usage: python benchmarks/bench_app.py [--requests 200] [--concurrency 8] [--image-kb 256] [--output run.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import types
+import base64
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+POLL_ROUTES = ['/api/queue', '/api/batch_status', '/get_messages', '/api/metrics', '/api/active']
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def peak_rss_mb():
+    """Peak resident set size of this process, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    return None
+
+class RouteStats:
+    """Latencies and status codes per route, shared by every load thread."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if status >= 400:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed):
+        with self._lock:
+            result = {}
+            for route, samples in sorted(self.samples.items()):
+                ordered = sorted(samples)
+                result[route] = {
+                    'count': len(ordered), 'errors': self.errors.get(route, 0),
+                    'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+                    'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+                    'p50_ms': round(percentile(ordered, 0.5) * 1000, 3),
+                    'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+                    'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+                    'max_ms': round(ordered[-1] * 1000, 3)
+                }
+            return result
+
+class SimulatedAgent:
+    """
+    Stands in for Cline: whenever the app presses Enter on a pasted message, it sends that
+    message back as a /chat/completions request, the way the extension would.
+    """
+    def __init__(self, delay=0.0, workers=8):
+        self.delay = delay
+        self.client = None
+        self.stats = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fake-agent")
+
+    def submit(self, message):
+        if self.client is not None and message:
+            self._pool.submit(self._reply, message)
+
+    def _reply(self, message):
+        if self.delay:
+            time.sleep(self.delay)
+        body = {'model': 'fake', 'stream': False, 'messages': [{'role': 'user', 'content': message}]}
+        start = time.perf_counter()
+        response = self.client().post('/chat/completions', json=body)
+        self.stats.record('POST /chat/completions (agent)', time.perf_counter() - start, response.status_code)
+
+def install_fakes(agent):
+    """Registers stand-ins for the Windows, browser and screen automation packages in sys.modules."""
+    clipboard = {}
+
+    def module(name, **attrs):
+        fake = types.ModuleType(name)
+        fake.__dict__.update(attrs)
+        sys.modules[name] = fake
+        return fake
+
+    class FakeWindow:
+        def __init__(self, title):
+            self.title = title
+            self.visible = True
+            self.isMinimized = False
+            self.isMaximized = True
+            self._hWnd = 0
+
+        def activate(self):
+            pass
+
+        def maximize(self):
+            pass
+
+        def restore(self):
+            pass
+
+    windows = [FakeWindow(f"main.py - project-{i} - Visual Studio Code") for i in range(8)]
+
+    def press(key, *args, **kwargs):
+        if key == 'enter':
+            agent.submit(clipboard.get('text'))
+
+    def screenshot(*args, **kwargs):
+        from PIL import Image
+        return Image.new('RGB', (1280, 720))
+
+    module('talktollm', talkto=lambda model, prompt, images, **kwargs: f"<attempt_completion><result>{len(prompt)}</result></attempt_completion>")
+    module('optimisewait', optimiseWait=lambda *args, **kwargs: {'found': True, 'image': args[0] if args else None},
+           set_autopath=lambda path: None, set_altpath=lambda path: None)
+    module('pyautogui', hotkey=lambda *keys, **kwargs: None, press=press, screenshot=screenshot,
+           click=lambda *args, **kwargs: None, moveTo=lambda *args, **kwargs: None, FAILSAFE=False)
+    module('win32clipboard', CF_DIB=8, CF_UNICODETEXT=13,
+           OpenClipboard=lambda *args: None, CloseClipboard=lambda: None, EmptyClipboard=clipboard.clear,
+           SetClipboardText=lambda text, *args: clipboard.__setitem__('text', text),
+           SetClipboardData=lambda fmt, data: clipboard.__setitem__('text' if fmt == 13 else fmt, data))
+    module('pywintypes', error=type('error', (Exception,), {'winerror': 0}))
+    module('pygetwindow', getAllWindows=lambda: list(windows), getAllTitles=lambda: [w.title for w in windows],
+           getWindowsWithTitle=lambda title: [w for w in windows if title in w.title],
+           getActiveWindow=lambda: windows[0])
+
+def boot_app(data_dir, args):
+    """Imports main.py against a scratch data directory so the real config, journal and state files are untouched."""
+    from modules import config_utils
+    config_utils.APP_PATH = data_dir
+    config_utils.DOTENV_PATH = os.path.join(data_dir, '.env')
+    config_utils.IGNORED_FILE = os.path.join(data_dir, 'ignored_folders.json')
+    shutil.copy(os.path.join(REPO_ROOT, 'unified_rules.txt'), data_dir)
+
+    import main
+    from modules.llm_backends import FakeBackend, FAKE_MODEL, register_backend
+    register_backend(FakeBackend(FAKE_MODEL, concurrency=args.backend_concurrency, max_pending=max(64, args.requests * 2),
+                                 latency=args.latency))
+    main.current_model = FAKE_MODEL
+    main.config['queue_settle_seconds'] = '0'
+    main.app.config['WTF_CSRF_ENABLED'] = False
+    main.limiter.enabled = False
+    main.find_vscode_executable = lambda: None
+    main.logger.setLevel('WARNING')
+    return main
+
+def make_image_uri(size_kb, rng):
+    """A PNG of random pixels, so it does not compress below roughly `size_kb`."""
+    from PIL import Image
+    side = max(8, int((size_kb * 1024 / 3) ** 0.5))
+    image = Image.frombytes('RGB', (side, side), rng.randbytes(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def chat_body(index, args, image_uris):
+    text = f"Request {index}: " + ("lorem ipsum dolor sit amet " * (args.prompt_chars // 27 + 1))[:args.prompt_chars]
+    content = [{'type': 'text', 'text': text}] + [{'type': 'image_url', 'image_url': {'url': uri}} for uri in image_uris]
+    return {'model': 'fake', 'stream': args.stream, 'messages': [
+        {'role': 'system', 'content': 'You are Cline.'},
+        {'role': 'user', 'content': content}
+    ]}
+
+def run_pollers(app, stats, stop, args):
+    def poll(worker):
+        client = app.test_client()
+        route_index = worker
+        while not stop.is_set():
+            route = POLL_ROUTES[route_index % len(POLL_ROUTES)]
+            route_index += 1
+            start = time.perf_counter()
+            response = client.get(route)
+            response.get_data()
+            stats.record(f"GET {route}", time.perf_counter() - start, response.status_code)
+            stop.wait(args.poll_interval)
+    threads = [threading.Thread(target=poll, args=(i,), daemon=True) for i in range(args.pollers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def chat_phase(app, stats, args, rng):
+    image_uris = [make_image_uri(args.image_kb, rng) for _ in range(args.images)]
+    local = threading.local()
+
+    def one(index):
+        client = getattr(local, 'client', None) or app.test_client()
+        local.client = client
+        start = time.perf_counter()
+        response = client.post('/chat/completions', json=chat_body(index, args, image_uris))
+        response.get_data()
+        stats.record('POST /chat/completions', time.perf_counter() - start, response.status_code)
+        return response.headers.get('X-ClineX-Source', 'error')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        sources = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    return {'requests': args.requests, 'seconds': round(elapsed, 3), 'rps': round(args.requests / elapsed, 1),
+            'payload_kb': round(len(json.dumps(chat_body(0, args, image_uris))) / 1024, 1),
+            'sources': {source: sources.count(source) for source in set(sources)}}
+
+def queue_phase(main, stats, args):
+    local = threading.local()
+    dispatched_before = main.task_scheduler.get_stats()['dispatched']
+
+    def one(index):
+        client = getattr(local, 'client', None) or main.app.test_client()
+        local.client = client
+        project_path = f"/bench/project-{index % args.projects}"
+        message = (f"Benchmark task {index}\n\n<environment_details>\n"
+                   f"# Current Working Directory ({project_path}) Files\n</environment_details>")
+        start = time.perf_counter()
+        response = client.post('/api/queue', json={'project_path': project_path, 'project_name': os.path.basename(project_path),
+                                                   'message': message})
+        stats.record('POST /api/queue', time.perf_counter() - start, response.status_code)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.tasks)))
+    enqueued = time.perf_counter() - start
+
+    deadline = time.monotonic() + args.queue_timeout
+    while time.monotonic() < deadline:
+        queue_stats = main.task_scheduler.get_stats()
+        if queue_stats['dispatched'] - dispatched_before >= args.tasks and not queue_stats['pending'] and not queue_stats['busy']:
+            break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    queue_stats = main.task_scheduler.get_stats()
+    return {'tasks': args.tasks, 'enqueue_seconds': round(enqueued, 3), 'seconds': round(elapsed, 3),
+            'tasks_per_second': round(args.tasks / elapsed, 1), 'finished': queue_stats['pending'] == 0 and not queue_stats['busy'],
+            'handoff_ms_avg': queue_stats['handoff_ms_avg'], 'window_switches': queue_stats['window_switches']}
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(previous, current):
+    """Prints p95 latency and throughput changes per route against an earlier result file."""
+    print(f"\nCompared with {previous.get('revision') or 'previous run'}:")
+    for route, now in current['routes'].items():
+        before = previous.get('routes', {}).get(route)
+        if not before:
+            continue
+        p95 = (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        rps = (now['rps'] - before['rps']) / before['rps'] * 100 if before['rps'] else 0.0
+        print(f"  {route:40s} p95 {before['p95_ms']:9.2f} -> {now['p95_ms']:9.2f} ms ({p95:+.0f}%)   "
+              f"rps {before['rps']:8.1f} -> {now['rps']:8.1f} ({rps:+.0f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='Chat completion requests')
+    parser.add_argument('--tasks', type=int, default=100, help='Queued tasks')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads per phase')
+    parser.add_argument('--projects', type=int, default=4, help='Fake projects the queued tasks are spread over')
+    parser.add_argument('--prompt-chars', type=int, default=20000)
+    parser.add_argument('--images', type=int, default=1, help='Base64 images per chat request')
+    parser.add_argument('--image-kb', type=int, default=256)
+    parser.add_argument('--stream', action='store_true', help='Request SSE streaming responses')
+    parser.add_argument('--latency', type=float, default=0.01, help='Fake model latency in seconds')
+    parser.add_argument('--backend-concurrency', type=int, default=4)
+    parser.add_argument('--agent-delay', type=float, default=0.0, help='Seconds the fake agent waits before answering')
+    parser.add_argument('--pollers', type=int, default=2, help='Background threads hitting the polling endpoints')
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    parser.add_argument('--queue-timeout', type=float, default=120)
+    parser.add_argument('--phases', default='chat,queue')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    agent = SimulatedAgent(delay=args.agent_delay, workers=args.concurrency)
+    install_fakes(agent)
+    data_dir = tempfile.mkdtemp(prefix='clinex-bench-')
+    boot_started = time.perf_counter()
+    main_module = boot_app(data_dir, args)
+    boot_seconds = time.perf_counter() - boot_started
+
+    stats = RouteStats()
+    agent.client = main_module.app.test_client
+    agent.stats = stats
+    stop = threading.Event()
+    pollers = run_pollers(main_module.app, stats, stop, args)
+    rng = random.Random(args.seed)
+
+    phases = {}
+    start = time.perf_counter()
+    for phase in [p.strip() for p in args.phases.split(',') if p.strip()]:
+        if phase == 'chat':
+            phases['chat'] = chat_phase(main_module.app, stats, args, rng)
+        elif phase == 'queue':
+            phases['queue'] = queue_phase(main_module, stats, args)
+        else:
+            parser.error(f"Unknown phase '{phase}'")
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in pollers:
+        thread.join()
+
+    results = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'args': vars(args),
+        'boot_seconds': round(boot_seconds, 3),
+        'seconds': round(elapsed, 3),
+        'phases': phases,
+        'routes': stats.summary(elapsed),
+        'memory': {'peak_rss_mb': peak_rss_mb()},
+        'backends': main_module.get_backend_stats(),
+        'queue': main_module.task_scheduler.get_stats()
+    }
+
+    print(f"{'route':40s} {'count':>6s} {'err':>4s} {'rps':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for route, row in results['routes'].items():
+        print(f"{route:40s} {row['count']:6d} {row['errors']:4d} {row['rps']:8.1f} {row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}")
+    print(json.dumps({'phases': phases, 'memory': results['memory']}, indent=4))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
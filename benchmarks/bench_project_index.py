@@ -0,0 +1,107 @@
+"""
+Compares the cached VS Code project index with re-reading storage.json on every call.
+A synthetic storage.json lists thousands of workspaces (a fraction of them deleted) under
+a temporary directory; each "call" is one dashboard request or window-matching pass.
+--hung adds a workspace whose stat takes --hung-seconds, standing in for a dead share.
+
+Usage: python benchmarks/bench_project_index.py [--workspaces 3000] [--missing 0.1] [--calls 200] [--hung 1]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modules.vscode_utils as vscode_utils
+from modules.vscode_utils import ProjectIndex, _uri_to_path
+
+def legacy_projects(storage_path):
+    """The previous get_vscode_projects(): parse, isdir and getmtime on every call."""
+    with open(storage_path, 'r', encoding='utf-8') as f:
+        storage_data = json.load(f)
+    project_uris = list(storage_data.get('profileAssociations', {}).get('workspaces', {}).keys())
+    cleaned_paths = [_uri_to_path(uri) for uri in project_uris if uri.startswith('file:///')]
+    folder_paths = [p for p in cleaned_paths if os.path.isdir(p)]
+    return sorted(folder_paths, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0, reverse=True)
+
+def to_uri(path):
+    path = path.replace('\\', '/')
+    return 'file://' + ('' if path.startswith('/') else '/') + quote(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workspaces', type=int, default=3000)
+    parser.add_argument('--missing', type=float, default=0.1, help='Fraction of workspaces whose folder no longer exists')
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--ttl', type=float, default=10.0, help='Stat cache TTL in seconds')
+    parser.add_argument('--hung', type=int, default=0, help='Workspaces on a simulated unresponsive mount')
+    parser.add_argument('--hung-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='clinex-projects-')
+    workspaces = {}
+    for i in range(args.workspaces):
+        path = os.path.join(root, f"project {i}")
+        if i >= args.workspaces * args.missing:
+            os.mkdir(path)
+        workspaces[to_uri(path)] = {'id': f"__default__profile__{i}"}
+    for i in range(args.hung):
+        path = os.path.join(root, 'hung-mount', f"project {i}")
+        os.makedirs(path)
+        workspaces[to_uri(path)] = {'id': f"__default__profile__hung{i}"}
+    storage_path = os.path.join(root, 'storage.json')
+    with open(storage_path, 'w', encoding='utf-8') as f:
+        json.dump({'profileAssociations': {'workspaces': workspaces}, 'padding': ['x' * 200] * args.workspaces}, f)
+
+    stat_folder = vscode_utils._stat_folder
+    def slow_stat(path):
+        if 'hung-mount' in path:
+            time.sleep(args.hung_seconds)
+        return stat_folder(path)
+    legacy_calls = args.calls if not args.hung else 1
+    real_isdir = os.path.isdir
+    os.path.isdir = lambda path: bool(slow_stat(path)[0]) if 'hung-mount' in path else real_isdir(path)
+
+    start = time.perf_counter()
+    for _ in range(legacy_calls):
+        expected = legacy_projects(storage_path)
+    legacy = (time.perf_counter() - start) / legacy_calls * args.calls
+    os.path.isdir = real_isdir
+    vscode_utils._stat_folder = slow_stat
+
+    index = ProjectIndex(stat_ttl=args.ttl, storage_paths=[storage_path])
+    start = time.perf_counter()
+    first = index.projects()
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        projects = index.projects()
+    cached = time.perf_counter() - start
+    assert projects == expected == first or args.hung, "cached index disagrees with a fresh scan"
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        index.find_by_name(f"project {args.workspaces - 1}")
+    by_name = time.perf_counter() - start
+
+    os.utime(storage_path, None)
+    start = time.perf_counter()
+    index.projects()
+    reparse = time.perf_counter() - start
+
+    print(f"{args.workspaces} workspaces ({len(expected)} on disk), {args.calls} calls:")
+    print(f"  legacy:   {legacy / args.calls * 1000:9.3f} ms per call")
+    print(f"  cached:   {cached / args.calls * 1000:9.3f} ms per call (cold {cold * 1000:.1f} ms, after storage.json change {reparse * 1000:.1f} ms)")
+    print(f"  by name:  {by_name / args.calls * 1000:9.3f} ms per lookup")
+    if args.hung:
+        print(f"  {len(index.unavailable())} workspace(s) marked unavailable instead of stalling each call for {args.hung_seconds:.0f}s")
+    print(json.dumps(index.get_stats(), indent=4))
+    shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
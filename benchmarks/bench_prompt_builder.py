@@ -0,0 +1,81 @@
+"""
+Compares the legacy prompt assembly (json.dumps + join + regex strip) with the
+single-pass prompt builder on requests carrying 5-20 MB of inline images.
+
+Usage: python benchmarks/bench_prompt_builder.py [--sizes 5 10 20] [--repeat 3]
+"""
+import os
+import re
+import sys
+import json
+import time
+import base64
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.prompt_utils import build_prompt, get_prompt_skeleton
+
+def make_request(image_mb, images=4, turns=40):
+    """Builds a Cline-shaped request whose images total roughly `image_mb` megabytes."""
+    per_image = max(1, (image_mb * 1024 * 1024) // images)
+    payload = base64.b64encode(os.urandom(per_image * 3 // 4)).decode('ascii')
+    mimes = ['png', 'jpeg', 'webp', 'gif']
+    messages = [{'role': 'system', 'content': 'You are Cline.'}]
+    for i in range(turns):
+        messages.append({'role': 'user', 'content': [{'type': 'text', 'text': f"[read_file for 'src/file_{i}.py'] Result:\n" + ("x = 1\n" * 200)}]})
+        messages.append({'role': 'assistant', 'content': f"<thinking>Step {i}</thinking>"})
+    last = [{'type': 'text', 'text': 'Here are the screenshots.'}]
+    for i in range(images):
+        last.append({'type': 'image_url', 'image_url': {'url': f"data:image/{mimes[i % len(mimes)]};base64,{payload}"}})
+    messages.append({'role': 'user', 'content': last})
+    return {'model': 'cline', 'messages': messages, 'stream': True}
+
+def legacy_build(request_json, prompt):
+    image_list = []
+    for message in request_json['messages']:
+        content = message.get('content', [])
+        if isinstance(content, list):
+            for item in content:
+                if isinstance(item, dict) and item.get('type') == 'image_url':
+                    image_url = item.get('image_url', {}).get("url", '')
+                    if image_url.startswith('data:image'):
+                        image_list.append(image_url)
+    headers_log = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - INFO - Request data: {json.dumps(request_json)}"
+    header, footer = get_prompt_skeleton('none', 'none')
+    fullpromptbefore = f"{headers_log}{header}{prompt}{footer}"
+    return re.sub(r'data:image\/png;base64,[A-Za-z0-9+\/=]+', '', fullpromptbefore), image_list
+
+def measure(fn, request_json, repeat):
+    cpu_times = []
+    peak = 0
+    out_len = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.process_time()
+        full_prompt = fn(request_json, 'Here are the screenshots.')[0]
+        cpu_times.append(time.process_time() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        out_len = len(full_prompt)
+    return {'cpu_ms': round(min(cpu_times) * 1000, 2), 'peak_mb': round(peak / (1024 * 1024), 2), 'prompt_kb': round(out_len / 1024, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        request_json = make_request(size)
+        legacy = measure(legacy_build, request_json, args.repeat)
+        single_pass = measure(lambda r, p: build_prompt(r, p, 'none', 'none'), request_json, args.repeat)
+        results.append({'image_mb': size, 'legacy': legacy, 'single_pass': single_pass})
+        print(f"{size:>3} MB | legacy: {legacy['cpu_ms']:>8} ms cpu, {legacy['peak_mb']:>7} MB peak, {legacy['prompt_kb']:>9} KB prompt"
+              f" | single-pass: {single_pass['cpu_ms']:>8} ms cpu, {single_pass['peak_mb']:>7} MB peak, {single_pass['prompt_kb']:>9} KB prompt")
+    print(json.dumps(results, indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for the response scanner on large multi-file write_to_file responses.
+Compares the legacy post-processing (substring search + DOTALL regex + splitlines) with
+the one-pass scanner on the full string and on streamed chunks.
+
+Usage: python benchmarks/bench_response_scanner.py [--files 50] [--file-kb 20] [--chunk 256] [--repeat 5]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.response_scanner import ResponseScanner, scan_response
+
+def make_response(files, file_kb):
+    line = 'export const value = "<div className=\'row\'>" + compute(1, 2);\n'
+    body = line * max(1, (file_kb * 1024) // len(line))
+    parts = ["```\n<thinking>\n<summary>Writing the generated modules.</summary>\nPlan the files.\n</thinking>\n"]
+    for i in range(files):
+        parts.append(f"<write_to_file>\n<path>src/module_{i}.ts</path>\n<content>\n{body}</content>\n</write_to_file>\n")
+    parts.append("<attempt_completion>\n<result>All modules written.</result>\n</attempt_completion>\n```")
+    return "".join(parts)
+
+def legacy(response):
+    has_completion = "<attempt_completion>" in response
+    summary_match = re.search(r"<summary>(.*?)</summary>", response, re.DOTALL)
+    summary = summary_match.group(1).strip() if summary_match else None
+    lines = response.splitlines(True)
+    return has_completion, summary, len(lines)
+
+def chunked(response, size):
+    scanner = ResponseScanner()
+    for i in range(0, len(response), size):
+        scanner.feed(response[i:i + size])
+    return scanner.close()
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(min(times) * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--file-kb', type=int, default=20)
+    parser.add_argument('--chunk', type=int, default=256, help='Streamed chunk size in characters')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    response = make_response(args.files, args.file_kb)
+    scanner = scan_response(response)
+    assert scanner.has_completion and scanner.summary and len(scanner.tool_calls) == args.files + 1
+
+    results = {
+        'response_kb': round(len(response) / 1024, 1),
+        'legacy_ms': best_of(lambda: legacy(response), args.repeat),
+        'scanner_full_ms': best_of(lambda: scan_response(response), args.repeat),
+        f'scanner_chunked_{args.chunk}_ms': best_of(lambda: chunked(response, args.chunk), args.repeat),
+        'tool_calls': len(scanner.tool_calls),
+        'violations': scanner.violations
+    }
+    print(json.dumps(results, indent=4))
+
+if __name__ == '__main__':
+    main()
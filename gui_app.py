@@ -8,6 +8,7 @@ try:
                                 QHBoxLayout, QLabel, QComboBox, QTextEdit, 
                                 QPushButton, QTabWidget, QTreeWidget, QTreeWidgetItem, QMessageBox)
     from PyQt6.QtCore import Qt, QThread, pyqtSignal
+    from PyQt6.QtGui import QColor
 except ImportError:
     print("PyQt6 not found. Installing...")
     subprocess.check_call([sys.executable, "-m", "pip", "install", "PyQt6"])
@@ -15,6 +16,7 @@ except ImportError:
                                 QHBoxLayout, QLabel, QComboBox, QTextEdit, 
                                 QPushButton, QTabWidget, QTreeWidget, QTreeWidgetItem, QMessageBox)
     from PyQt6.QtCore import Qt, QThread, pyqtSignal
+    from PyQt6.QtGui import QColor
 
 BASE_URL = "http://127.0.0.1:3001"
 
@@ -31,17 +33,63 @@ class ProjectFetcher(QThread):
         except Exception as e:
             print(f"Fetch projects error: {e}")
 
-class QueuePoller(QThread):
+class QueueEventStream(QThread):
+    """Follows /api/queue/events and emits the full queue state whenever it changes."""
     queue_fetched = pyqtSignal(dict)
-    
+
+    def __init__(self):
+        super().__init__()
+        self.last_event_id = None
+        self.queue = []
+        # Lane index -> the task it is running; several lanes can run at once
+        self.running = {}
+        self.system_busy = False
+
+    def apply_event(self, kind, data):
+        if kind == 'snapshot':
+            self.queue = data.get('queue', [])
+            self.running = {lane['lane']: lane['task'] for lane in data.get('lanes', []) if lane.get('task')}
+            self.system_busy = data.get('system_busy', False)
+            return
+        task = data.get('task')
+        if kind == 'enqueue':
+            self.queue.append(task)
+            # Same order the server dispatches in: priority first, then arrival
+            self.queue.sort(key=lambda q: -int(q.get('priority') or 0))
+        elif kind == 'start':
+            self.queue = [q for q in self.queue if q['id'] != task['id']]
+            self.running[data.get('lane', 0)] = task
+        elif kind in ('complete', 'fail', 'cancel', 'requeue'):
+            self.queue = [q for q in self.queue if q['id'] != task['id']]
+            self.running = {lane: t for lane, t in self.running.items() if t['id'] != task['id']}
+            if kind == 'requeue':
+                self.queue.insert(0, task)
+        self.system_busy = data.get('busy', self.system_busy)
+
     def run(self):
         while True:
             try:
-                req = urllib.request.Request(f"{BASE_URL}/api/queue")
-                with urllib.request.urlopen(req, timeout=2) as response:
-                    if response.status == 200:
-                        data = json.loads(response.read().decode())
-                        self.queue_fetched.emit(data)
+                headers = {'Accept': 'text/event-stream'}
+                if self.last_event_id:
+                    headers['Last-Event-ID'] = self.last_event_id
+                req = urllib.request.Request(f"{BASE_URL}/api/queue/events", headers=headers)
+                # The server sends a keep-alive every 15 s, so a longer silence means the link is gone
+                with urllib.request.urlopen(req, timeout=30) as response:
+                    event_id, kind, data_lines = None, 'message', []
+                    for raw in response:
+                        line = raw.decode('utf-8').rstrip('\r\n')
+                        if line.startswith('id:'):
+                            event_id = line[3:].strip()
+                        elif line.startswith('event:'):
+                            kind = line[6:].strip()
+                        elif line.startswith('data:'):
+                            data_lines.append(line[5:].strip())
+                        elif not line and data_lines:
+                            self.apply_event(kind, json.loads('\n'.join(data_lines)))
+                            self.last_event_id = event_id or self.last_event_id
+                            running = [self.running[lane] for lane in sorted(self.running)]
+                            self.queue_fetched.emit({'queue': list(self.queue), 'running': running, 'system_busy': self.system_busy})
+                            event_id, kind, data_lines = None, 'message', []
             except Exception:
                 pass
             self.msleep(2000)
@@ -230,9 +278,9 @@ class ClineXGUI(QMainWindow):
         self.proj_fetcher.projects_fetched.connect(self.populate_projects)
         self.proj_fetcher.start()
 
-        self.queue_poller = QueuePoller()
-        self.queue_poller.queue_fetched.connect(self.update_queue)
-        self.queue_poller.start()
+        self.queue_events = QueueEventStream()
+        self.queue_events.queue_fetched.connect(self.update_queue)
+        self.queue_events.start()
 
     def populate_projects(self, data):
         self.projects = data
@@ -279,12 +327,12 @@ class ClineXGUI(QMainWindow):
         QMessageBox.critical(self, "Error", f"Failed to add to queue:\n{err_msg}")
 
     def update_queue(self, data):
-        current = data.get('current')
+        running = data.get('running', [])
         queue = data.get('queue', [])
         system_busy = data.get('system_busy', False)
 
-        if current:
-            self.current_lbl.setText(f"RUNNING: {current['project_name'].upper()}")
+        if running:
+            self.current_lbl.setText("RUNNING: " + ", ".join(t['project_name'].upper() for t in running))
             self.current_lbl.setStyleSheet("color: #8b5cf6; font-size: 11px; letter-spacing: 1px;")
         elif system_busy:
             self.current_lbl.setText("STATUS: BUSY (ACTIVE TASK)")
@@ -294,12 +342,14 @@ class ClineXGUI(QMainWindow):
             self.current_lbl.setStyleSheet("color: #10b981; font-size: 11px; letter-spacing: 1px;")
 
         self.queue_tree.clear()
-        for q in queue:
+        for q in running + queue:
             msg_preview = q['message'].replace('\n', ' ')
             if len(msg_preview) > 60:
                 msg_preview = msg_preview[:57] + '...'
             
             item = QTreeWidgetItem([q['project_name'], msg_preview])
+            if q in running:
+                item.setForeground(0, QColor("#8b5cf6"))
             self.queue_tree.addTopLevelItem(item)
 
 if __name__ == '__main__':
@@ -21,23 +21,36 @@ import pyautogui
 import threading
 
 from optimisewait import set_autopath, set_altpath
-from talktollm import talkto
 from typing import Union, List, Dict
 
 # --- Import Local Modules ---
-from modules.config_utils import get_app_path, read_config, write_config, get_rules_content, APP_PATH, DOTENV_PATH
-from modules.clipboard_utils import set_clipboard, set_clipboard_image
-from modules.vscode_utils import (force_bring_to_front, load_ignored_folders, save_ignored_folder,
+from modules.config_utils import get_app_path, read_config, write_config, APP_PATH, DOTENV_PATH
+from modules.prompt_utils import build_prompt, prompt_fingerprint, image_digest
+from modules.image_pipeline import ImageIngestor, count_images
+from modules.llm_backends import init_backends, get_backend, available_models, get_backend_stats, BackendBusyError, ResponseStream, parse_min_interval
+from modules.response_cache import ResponseCache
+from modules.single_flight import SingleFlight
+from modules.task_queue import TaskScheduler, parse_affinity_window, parse_schedule
+from modules.input_lock import input_device
+from modules.queue_journal import QueueJournal
+from modules.event_log import EventLog
+from modules.metrics import TaskMetrics
+from modules.prompt_compactor import compact_request, get_compaction_settings, get_compaction_totals
+from modules.clipboard_utils import set_clipboard, set_clipboard_dib
+from modules.vscode_utils import (force_bring_to_front, ignore_registry,
                                   find_vscode_executable, get_vscode_projects, find_project_icon,
-                                  get_active_windows, gw)
+                                  get_active_windows, gw, icon_index)
 from modules.terminal_utils import clear_previous_alert, print_completion_alert, print_summary_alert, print_startup_banner
 from modules.notify_utils import send_ntfy_notification
-from modules.project_utils import get_ui_projects_data, get_ui_active_windows, get_project_icon_info
-from modules.window_manager import focus_and_maximize_window, wait_for_vscode_window
+from modules.project_utils import get_ui_projects_data, get_ui_active_windows, get_project_icon_info, get_visible_projects
+from modules.bulk_queue import build_bulk_tasks, BulkQueueError
+from modules.icon_sprites import IconSprites
+from modules.window_manager import focus_and_maximize_window, wait_for_vscode_window, find_vscode_window, focus_vscode_window
 
 # --- Newly Extracted Modules ---
 from modules.chat_manager import add_chat_message, chat_history
-from modules.llm_utils import get_content_text
+from modules.llm_utils import get_content_text, get_working_directory
+from modules.response_scanner import ResponseScanner, get_violation_totals
 from modules.automation_utils import process_optimisewait_message
 from modules.project_manager import (load_project_links, save_project_links, 
                                      filter_ignored_projects, get_all_projects_with_ignore_state)
@@ -60,6 +73,10 @@ terminal_log_level = config.get('terminal_log_level', 'default')
 terminal_alert_level = config.get('terminal_alert_level', 'none')
 tunnel_active = str(config.get('tunnel_active', 'False')).lower() == 'true'
 auth_required = str(config.get('auth_required', 'False')).lower() == 'true'
+init_backends(config)
+if current_model not in available_models():
+    # e.g. 'fake' saved while enable_fake_backend was on
+    current_model = 'gemini'
 
 # --- LOGGING SETUP ---
 class CustomFormatter(logging.Formatter):
@@ -93,65 +110,61 @@ alert_state = {'lines_printed': 0, 'active': False}
 # --- Batch Process State ---
 global_completion_status = False
 global_last_reply = ""
-
-# --- System Busy State ---
-system_busy = False
+# Every change is also published here, so long-polling clients never miss a completion
+completion_events = EventLog()
+batch_status_lock = threading.Lock()
+BATCH_STATUS_MAX_WAIT = 60
+
+def set_batch_status(kind, completed, last_reply):
+    """Updates the batch status globals and publishes the change ('reset', 'reply' or 'completion')."""
+    global global_completion_status, global_last_reply
+    with batch_status_lock:
+        global_completion_status = completed
+        global_last_reply = last_reply
+        completion_events.publish(kind, completed=completed, last_reply=last_reply)
 
 # --- Task Queue State ---
-task_queue = []
-current_queue_task = None
-queue_lock = threading.Lock()
+def run_queue_task(task):
+    """
+    Starts one queued task: opens its project and sends the message. Runs on a scheduler
+    lane thread. Waiting for the window and the settle pause happen without the input
+    device; only focusing the window, pasting and pressing Enter hold it, back to back,
+    so no other lane can take focus in between.
+    """
+    project_path = task.get('project_path')
+    message = task.get('message')
+
+    window = None
+    vscode_exe = find_vscode_executable()
+    if vscode_exe and project_path and os.path.isdir(project_path):
+        subprocess.Popen([vscode_exe, project_path], creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        window = find_vscode_window(os.path.basename(project_path))
+    task_scheduler.mark_stage(task, 'window_ready')
 
-def process_next_queue_item():
-    global task_queue, current_queue_task, global_completion_status, global_last_reply, system_busy
-    
-    timeout_minutes = int(config.get('queue_timeout_minutes', 5))
-    wait_timeout = timeout_minutes * 60
-    start_wait = time.time()
-    
-    while True:
-        # Wait if the system is currently processing any LLM interaction
-        while system_busy:
-            if time.time() - start_wait > wait_timeout:
-                logger.warning("Queue wait timeout exceeded, proceeding with next task.")
-                system_busy = False
-                break
-            time.sleep(2)
-            
-        with queue_lock:
-            # Re-check inside lock to ensure another thread didn't beat us
-            if system_busy:
-                continue
-                
-            if not task_queue:
-                current_queue_task = None
-                return
-                
-            current_queue_task = task_queue.pop(0)
-            system_busy = True
-            break # Got the task, exit the polling loop
-    
-    try:
-        project_path = current_queue_task.get('project_path')
-        message = current_queue_task.get('message')
-        
-        vscode_exe = find_vscode_executable()
-        if vscode_exe and project_path and os.path.isdir(project_path):
-            subprocess.Popen([vscode_exe, project_path], creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-            project_name = os.path.basename(project_path)
-            wait_for_vscode_window(project_name)
-        
-        time.sleep(1) # Extra stability wait
-        
-        global_completion_status = False
-        global_last_reply = ""
-        add_chat_message('user', message)
+    time.sleep(float(config.get('queue_settle_seconds', 1))) # Extra stability wait
+
+    set_batch_status('reset', False, "")
+    add_chat_message('user', message)
+    with input_device.hold('focus'):
+        if window is not None:
+            focus_vscode_window(window)
         process_optimisewait_message(message, debug=(terminal_log_level == 'debug'))
-    except Exception as e:
-        logger.error(f"Error processing queue item: {e}")
-        system_busy = False
-        current_queue_task = None
-        threading.Thread(target=process_next_queue_item, daemon=True).start()
+    task_scheduler.mark_stage(task, 'pasted')
+
+queue_events = EventLog()
+task_metrics = TaskMetrics()
+task_scheduler = TaskScheduler(run_queue_task, timeout_seconds=int(config.get('queue_timeout_minutes', 5)) * 60,
+                               journal=QueueJournal(os.path.join(APP_PATH, 'task_queue.journal')),
+                               affinity_window=int(config.get('queue_affinity_window', 3)),
+                               events=queue_events, metrics=task_metrics,
+                               deadline_seconds=int(config.get('queue_task_deadline_minutes', 60)) * 60,
+                               max_attempts=int(config.get('queue_max_attempts', 2)),
+                               quiet_seconds=int(config.get('queue_quiet_seconds', 30)),
+                               lanes=int(config.get('queue_lanes', 1)))
+task_metrics.registry.gauge('clinex_queue_depth', "Tasks waiting in the queue.", lambda: task_scheduler.get_stats()['pending'])
+task_metrics.registry.gauge('clinex_system_busy', "1 while the browser automation is in use.", lambda: task_scheduler.busy)
+task_metrics.registry.gauge('clinex_queue_window_switches_avoided', "VS Code window switches saved by project batching.",
+                            lambda: task_scheduler.get_stats()['window_switches_avoided'])
 
 # --- API Key (only used when auth_required is True) ---
 API_KEY = secrets.token_urlsafe(32)
@@ -185,56 +198,248 @@ limiter = Limiter(
     storage_uri="memory://"
 )
 
-last_request_time = 0
-MIN_REQUEST_INTERVAL = 5
+# --- Icon sprite sheet (rebuilt in the background when icons change) ---
+icon_sprites = IconSprites(get_vscode_projects)
+
+@app.context_processor
+def inject_icon_sprite():
+    return {'icon_sprite': icon_sprites.current_map()}
 
 set_autopath(r"D:\cline-x-claudeweb\images")
 set_altpath(r"D:\cline-x-claudeweb\images\alt1440")
 
+# --- Response Cache (opt-in) ---
+def get_response_cache_settings():
+    return {
+        'enabled': str(config.get('response_cache_enabled', 'False')).lower() == 'true',
+        'ttl_seconds': int(config.get('response_cache_ttl_seconds', 600)),
+        'max_entries': int(config.get('response_cache_max_entries', 64)),
+        'max_bytes': int(float(config.get('response_cache_max_mb', 16)) * 1024 * 1024)
+    }
+
+response_cache = ResponseCache(**get_response_cache_settings())
+
+# --- In-flight request coalescing ---
+single_flight = SingleFlight()
+
+# --- Inline image decoding ---
+image_ingestor = ImageIngestor(max_pixels=int(config.get('image_max_pixels', 4_000_000)),
+                               cache_entries=int(config.get('image_cache_entries', 32)))
+
 # --- CORE LOGIC ---
-def handle_llm_interaction(prompt):
-    global last_request_time
-    clear_previous_alert(alert_state)
-    
-    logger.info(f"Starting {current_model} interaction.")
+SSE_KEEPALIVE_SECONDS = 15
+ICON_MAX_AGE_SECONDS = 60
+ICON_SPRITE_MAX_AGE_SECONDS = 365 * 24 * 3600
+
+def finalize_llm_response(response_stream, project_path=None):
+    """
+    Runs once a model response has fully arrived: records it in the chat history,
+    hands the queue on after a completion, and fires terminal alerts and notifications.
+    """
+    response = response_stream.text()
+    scanner = response_stream.tracker
+    has_completion = scanner.has_completion
+    summary = scanner.summary
+
+    if scanner.violations:
+        logger.warning(f"Response broke the output protocol: {' '.join(scanner.describe_violations())}")
+    if scanner.tool_calls:
+        logger.debug(f"Tool calls in response: {', '.join(call['tool'] for call in scanner.tool_calls)}")
+
+    added_to_chat = False
+    def chat_adder_with_full_text(r, t):
+        nonlocal added_to_chat
+        add_chat_message(r, t, full_text=response)
+        added_to_chat = True
+
+    if has_completion:
+        set_batch_status('completion', True, summary if summary else "Task completed successfully.")
+        if terminal_alert_level in ['completions', 'all']:
+            print_completion_alert(alert_state)
+        
+        # Hand the queue on to the next task
+        task_scheduler.mark_idle(project_path)
+        
+    elif summary:
+        set_batch_status('reply', global_completion_status, summary)
+        if terminal_alert_level == 'all':
+            print_summary_alert(summary, chat_adder_with_full_text)
 
-    current_time = time.time()
-    time_since_last = current_time - last_request_time
-    if time_since_last < MIN_REQUEST_INTERVAL:
-        sleep(MIN_REQUEST_INTERVAL - time_since_last)
-    last_request_time = time.time()
+    if not has_completion:
+        # The agent is still working: a finished reply counts as a watchdog heartbeat
+        task_scheduler.mark_busy(project_path)
 
-    request_json = request.get_json()
-    image_list = []
-    
-    if 'messages' in request_json:
-        for message in request_json['messages']:
-            content = message.get('content', [])
-            if isinstance(content, list):
-                for item in content:
-                    if isinstance(item, dict) and item.get('type') == 'image_url':
-                        image_url = item.get('image_url', {}).get("url", '')
-                        if image_url.startswith('data:image'):
-                            image_list.append(image_url)
-
-    current_time_str = time.strftime('%Y-%m-%d %H:%M:%S')
-    headers_log = f"{current_time_str} - INFO - Request data: {json.dumps(request_json)}"
-
-    unified_rules = get_rules_content()
-    prompt_instructions = [headers_log]
-
-    if terminal_alert_level == 'all' or ntfy_notification_level == 'all':
-        summary_instruction = r"You MUST include a `<summary>` tag inside your `<thinking>` block for every tool call. This summary should be a very brief, user-friendly explanation of the action you are about to take. For example: `<summary>Reading the project's configuration to check dependencies.</summary>`."
-        prompt_instructions.append(summary_instruction)
-
-    prompt_instructions.append(prompt)
-    prompt_instructions.append(unified_rules)
-    
-    fullpromptbefore = "\n".join(prompt_instructions)
-    full_prompt = re.sub(r'data:image\/png;base64,[A-Za-z0-9+\/=]+', '', fullpromptbefore)
+    ntfy_topic = config.get('ntfy_topic', '')
+    if ntfy_notification_level == 'all':
+        if has_completion:
+            send_ntfy_notification(
+                topic=ntfy_topic,
+                simple_title="Cline-X: Task Completion",
+                full_content=summary or "Task completion submitted.",
+                add_chat_message_func=chat_adder_with_full_text,
+                tags="tada"
+            )
+        elif summary:
+            send_ntfy_notification(
+                topic=ntfy_topic,
+                simple_title="[INFO] Cline-X: AI Response",
+                full_content=summary,
+                add_chat_message_func=chat_adder_with_full_text,
+                tags="robot_face"
+            )
+    elif ntfy_notification_level == 'completion' and has_completion:
+        send_ntfy_notification(
+            topic=ntfy_topic,
+            simple_title="Cline-X: Task Completion",
+            full_content=response,
+            add_chat_message_func=chat_adder_with_full_text,
+            tags="tada"
+        )
+
+    if not added_to_chat:
+        chat_adder_with_full_text('assistant', summary if summary else ("Task completed successfully." if has_completion else "Processed response."))
+
+def finalize_cached_response(response_stream, project_path=None):
+    """
+    Settles the queue for a response served from the cache. The request that hit the cache
+    marked its lane busy like any other, so a cached completion must hand the queue on too;
+    alerts and notifications already fired when the response was first generated.
+    """
+    scanner = response_stream.tracker
+    if scanner.has_completion:
+        set_batch_status('completion', True, scanner.summary if scanner.summary else "Task completed successfully.")
+        task_scheduler.mark_idle(project_path)
+
+def handle_llm_interaction(prompt, project_path=None):
+    """
+    Starts the model on the current request and returns (response_stream, meta), where the
+    stream fills up as the model answers and meta['source'] is 'model', 'cache' or 'coalesced'.
+    finalize_llm_response runs on the backend worker once a fresh model run closes; project_path
+    tells the scheduler which lane the response belongs to.
+    """
+    clear_previous_alert(alert_state)
+
+    request_json, compaction = compact_request(request.get_json(), get_compaction_settings(config))
+    if compaction['chars_before'] != compaction['chars_after']:
+        saved = compaction['chars_before'] - compaction['chars_after']
+        logger.info(f"Compacted conversation from {compaction['chars_before']} to {compaction['chars_after']} characters (-{saved * 100 // max(1, compaction['chars_before'])}%).")
+    meta = {'source': 'model', **compaction}
+
+    built = build_prompt(request_json, prompt, terminal_alert_level, ntfy_notification_level)
+    image_digests = [image_digest(image) for image in built.images]
+    request_key = prompt_fingerprint(built, current_model, image_digests)
+
+    cached_response = response_cache.get(request_key)
+    if cached_response is not None:
+        logger.info(f"Serving cached {current_model} response.")
+        response_stream = ResponseStream.completed(cached_response, tracker=ResponseScanner())
+        finalize_cached_response(response_stream, project_path)
+        return response_stream, dict(meta, source='cache')
+
+    backend = get_backend(current_model)
+    if backend is None:
+        raise ValueError(f"No backend registered for model '{current_model}'")
+
+    def on_complete(response_stream):
+        finalize_llm_response(response_stream, project_path)
+
+    def cache_response(response_stream):
+        if response_stream.error is None:
+            response_cache.put(request_key, response_stream.text())
+
+    def start():
+        logger.info(f"Starting {current_model} interaction.")
+        debug_mode = (terminal_log_level == 'debug')
+
+        # Size-check every inline image once (in parallel, cached by content hash); only the
+        # latest message's last image is converted for the clipboard, and it goes on the
+        # clipboard once the backend holds the input device, so another lane cannot overwrite it
+        images = image_ingestor.ingest(built.images, image_digests)
+        latest_images = count_images(request_json['messages'][-1].get('content')) if request_json.get('messages') else 0
+        prepare = None
+        dib = image_ingestor.clipboard_dib(images[-1]) if latest_images else None
+        if dib:
+            prepare = lambda: set_clipboard_dib(dib, debug=debug_mode)
+
+        # The backend paces starts per model on its own timer; this thread never sleeps
+        response_stream = backend.submit_stream(built.text, [image.data_uri for image in images], debug=debug_mode,
+                                                tracker=ResponseScanner(), on_complete=on_complete, prepare=prepare)
+        # Registered before single_flight's release callback, so a duplicate arriving after
+        # the key is released always finds the response in the cache
+        response_stream.add_done_callback(cache_response)
+        if response_stream.queue_delay > 0:
+            logger.info(f"Pacing {current_model}: start delayed by {response_stream.queue_delay:.1f}s.")
+        return response_stream
+
+    response_stream, is_leader = single_flight.run(request_key, start)
+    if not is_leader:
+        logger.info(f"Attached duplicate request to the in-flight {current_model} run.")
+        return response_stream, dict(meta, source='coalesced')
+    return response_stream, dict(meta, queue_delay=response_stream.queue_delay)
+
+def stream_chat_chunks(request_id, response_stream):
+    """
+    Forwards model output to the client as OpenAI-style SSE chunks while it is generated.
+    Browser backends produce their answer in one piece (see TalkToBackend.stream), so for
+    them this only keeps the connection alive until the full text arrives.
+    """
+    def make_chunk(delta, finish_reason=None):
+        chunk = {"id": request_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": "gpt-3.5-turbo", "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    yield make_chunk({"role": "assistant"})
+    for content in response_stream.iter_chunks(keepalive=SSE_KEEPALIVE_SECONDS):
+        if content is None:
+            # SSE comment keeps proxies and the client from timing out while the model thinks
+            yield ": keep-alive\n\n"
+            continue
+        yield make_chunk({"content": content})
 
-    debug_mode = (terminal_log_level == 'debug')
-    return talkto(current_model, full_prompt, image_list, debug=debug_mode,humanize=True, windmouse=True)
+    if response_stream.error is not None:
+        yield f"data: {json.dumps({'error': {'message': str(response_stream.error)}})}\n\n"
+    else:
+        yield make_chunk({}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+def parse_event_id(event_id, event_log):
+    """Turns an '<epoch>-<seq>' event id into a sequence number, or None if it is from another run."""
+    epoch, _, seq = str(event_id or '').rpartition('-')
+    if epoch != event_log.epoch or not seq.isdigit():
+        return None
+    return int(seq)
+
+def running_task(lanes):
+    """The first lane's running task, still sent as 'current' for clients that know only one lane."""
+    return next((lane['task'] for lane in lanes if lane['task'] is not None), None)
+
+def stream_queue_events(since):
+    """
+    SSE stream of queue events. Starts with a 'snapshot' event unless the client can resume
+    from `since`, and sends a fresh snapshot whenever it has fallen too far behind.
+    """
+    def make_event(seq, kind, data):
+        return f"id: {queue_events.epoch}-{seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+    def make_snapshot():
+        queue, lanes, busy, seq = task_scheduler.versioned_snapshot()
+        return seq, make_event(seq, 'snapshot', {'queue': queue, 'lanes': lanes, 'current': running_task(lanes), 'system_busy': busy})
+
+    complete = since is not None and queue_events.since(since)[1]
+    if not complete:
+        since, snapshot = make_snapshot()
+        yield snapshot
+    while True:
+        events, complete = queue_events.wait(since, timeout=SSE_KEEPALIVE_SECONDS)
+        if not complete:
+            since, snapshot = make_snapshot()
+            yield snapshot
+            continue
+        if not events:
+            yield ": keep-alive\n\n"
+            continue
+        for event in events:
+            yield make_event(event['seq'], event['type'], event['data'])
+        since = events[-1]['seq']
 
 # --- FLASK ROUTES ---
 @app.route('/', methods=['GET'])
@@ -249,6 +454,7 @@ def home():
                            terminal_alert_level=terminal_alert_level,
                            ntfy_notification_level=ntfy_notification_level,
                            queue_timeout_minutes=int(config.get('queue_timeout_minutes', 5)),
+                           response_cache_stats=response_cache.get_stats(),
                            config=config,
                            tunnel_active=tunnel_active,
                            auth_required=auth_required,
@@ -267,7 +473,7 @@ def model_route():
             clear_previous_alert(alert_state)
             data = request.get_json()
             new_model = data['model'].lower()
-            if new_model not in ['deepseek', 'gemini', 'aistudio', 'aistudio_flash', 'gemini-3.1-flash-lite-preview']:
+            if new_model not in available_models():
                 return jsonify({'success': False, 'error': 'Invalid model'}), 400
             
             current_model = new_model
@@ -279,6 +485,43 @@ def model_route():
             logger.error(f"Error switching model: {str(e)}")
             return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/backends', methods=['GET'])
+@limiter.exempt
+def backends_route():
+    return jsonify({'current': current_model, 'backends': get_backend_stats(), 'single_flight': single_flight.get_stats(),
+                    'compaction': get_compaction_totals(), 'images': image_ingestor.get_stats(),
+                    'protocol_violations': get_violation_totals()})
+
+@app.route('/api/pacing', methods=['GET', 'POST'])
+@limiter.exempt
+def pacing_route():
+    global config
+    if request.method == 'GET':
+        return jsonify({b['name']: {'min_interval': b['min_interval'], **b['pacing']} for b in get_backend_stats()})
+
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or 'model' not in data or 'interval' not in data:
+            return jsonify({'success': False, 'error': 'Invalid request'}), 400
+
+        backend = get_backend(data['model']) if isinstance(data['model'], str) else None
+        if backend is None:
+            return jsonify({'success': False, 'error': 'Invalid model'}), 400
+
+        try:
+            interval = parse_min_interval(data['interval'])
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        backend.min_interval = interval
+        intervals = config.get('model_request_intervals')
+        config['model_request_intervals'] = dict(intervals if isinstance(intervals, dict) else {}, **{backend.name: interval})
+        write_config(config)
+        logger.info(f"Request interval for {backend.name} set to: {interval}s")
+        return jsonify({'success': True, 'model': backend.name, 'interval': interval})
+    except Exception as e:
+        logger.error(f"Error setting request interval: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/notifications', methods=['POST'])
 @limiter.exempt
 def notification_settings():
@@ -512,100 +755,43 @@ def open_rules_file():
 @csrf.exempt
 @limiter.limit("20 per minute")
 def chat_completions():
-    global system_busy
-    system_busy = True
+    data = request.get_json()
+    if not data or 'messages' not in data:
+        return jsonify({'error': {'message': 'Invalid request format'}}), 400
+
+    # Cline names its workspace in every request; that is how the reply finds its queue lane
+    project_path = get_working_directory(data['messages'])
+    task_scheduler.mark_busy(project_path)
     try:
         clear_previous_alert(alert_state)
-        
-        data = request.get_json()
-        if not data or 'messages' not in data:
-            return jsonify({'error': {'message': 'Invalid request format'}}), 400
 
         prompt = get_content_text(data['messages'][-1].get('content', ''), debug=(terminal_log_level == 'debug'))
         
         is_streaming = data.get('stream', False)
-        response = handle_llm_interaction(prompt)
+        response_stream, meta = handle_llm_interaction(prompt, project_path)
         request_id = f'chatcmpl-{int(time.time())}'
 
-        has_completion = "<attempt_completion>" in response
-        
-        summary_match = re.search(r"<summary>(.*?)</summary>", response, re.DOTALL)
-        summary = summary_match.group(1).strip() if summary_match else None
-
-        added_to_chat = False
-        def chat_adder_with_full_text(r, t):
-            nonlocal added_to_chat
-            add_chat_message(r, t, full_text=response)
-            added_to_chat = True
-
-        global global_completion_status, global_last_reply
-        if has_completion:
-            system_busy = False
-            global_completion_status = True
-            global_last_reply = summary if summary else "Task completed successfully."
-            if terminal_alert_level in ['completions', 'all']:
-                print_completion_alert(alert_state)
-            
-            # TRIGGER QUEUE NEXT ITEM
-            threading.Thread(target=process_next_queue_item, daemon=True).start()
-            
-        elif summary:
-            global_last_reply = summary
-            if terminal_alert_level == 'all':
-                print_summary_alert(summary, chat_adder_with_full_text)
-
-        ntfy_topic = config.get('ntfy_topic', '')
-        if ntfy_notification_level == 'all':
-            if has_completion:
-                send_ntfy_notification(
-                    topic=ntfy_topic,
-                    simple_title="Cline-X: Task Completion",
-                    full_content=summary or "Task completion submitted.",
-                    add_chat_message_func=chat_adder_with_full_text,
-                    tags="tada"
-                )
-            elif summary:
-                send_ntfy_notification(
-                    topic=ntfy_topic,
-                    simple_title="[INFO] Cline-X: AI Response",
-                    full_content=summary,
-                    add_chat_message_func=chat_adder_with_full_text,
-                    tags="robot_face"
-                )
-        elif ntfy_notification_level == 'completion' and has_completion:
-            send_ntfy_notification(
-                topic=ntfy_topic,
-                simple_title="Cline-X: Task Completion",
-                full_content=response,
-                add_chat_message_func=chat_adder_with_full_text,
-                tags="tada"
-            )
+        response_headers = {
+            'X-ClineX-Source': meta['source'],
+            'X-ClineX-Prompt-Chars': f"{meta['chars_before']}/{meta['chars_after']}",
+            'X-ClineX-Queue-Delay': f"{meta.get('queue_delay', 0.0):.3f}"
+        }
+        if response_cache.enabled:
+            response_headers['X-ClineX-Cache'] = 'HIT' if meta['source'] == 'cache' else 'MISS'
 
-        if not added_to_chat:
-            chat_adder_with_full_text('assistant', summary if summary else ("Task completed successfully." if has_completion else "Processed response."))
-        
         if is_streaming:
-            def generate():
-                chunk = {"id": request_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": "gpt-3.5-turbo", "choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]}
-                yield f"data: {json.dumps(chunk)}\n\n"
-                
-                lines = response.splitlines(True)
-                for line in lines:
-                    content_chunk = {"id": request_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": "gpt-3.5-turbo", "choices": [{"index": 0, "delta": {"content": line}, "finish_reason": None}]}
-                    yield f"data: {json.dumps(content_chunk)}\n\n"
-                
-                stop_chunk = {"id": request_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": "gpt-3.5-turbo", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
-                yield f"data: {json.dumps(stop_chunk)}\n\n"
-                yield "data: [DONE]\n\n"
-            
-            return Response(generate(), mimetype='text/event-stream')
+            return Response(stream_chat_chunks(request_id, response_stream), mimetype='text/event-stream', headers=response_headers)
 
+        response = response_stream.result()
         return jsonify({
             'id': request_id, 'object': 'chat.completion', 'created': int(time.time()),
             'model': 'gpt-3.5-turbo', 'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': response}, 'finish_reason': 'stop'}],
             'usage': {'prompt_tokens': len(prompt), 'completion_tokens': len(response), 'total_tokens': len(prompt) + len(response)}
-        })
+        }), 200, response_headers
         
+    except BackendBusyError as e:
+        logger.warning(str(e))
+        return jsonify({'error': {'message': str(e)}}), 503
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}", exc_info=True)
         return jsonify({'error': {'message': str(e)}}), 500
@@ -800,10 +986,43 @@ def multi_project():
 @app.route('/api/batch_status')
 @limiter.exempt
 def batch_status():
-    return jsonify({
-        'completed': global_completion_status,
-        'last_reply': global_last_reply
-    })
+    """
+    Current completion state, versioned. With `since=<version>` (or If-None-Match) and
+    `timeout=<seconds>` the request long-polls until something newer is published, and the
+    response lists every event after `since` so no completion is missed.
+    """
+    since = request.args.get('since')
+    if since is None and request.if_none_match:
+        since = next(iter(request.if_none_match), None)
+    since_seq = parse_event_id(since, completion_events) if since else None
+    try:
+        timeout = min(max(float(request.args.get('timeout', 0)), 0.0), BATCH_STATUS_MAX_WAIT)
+    except ValueError:
+        return jsonify({'error': 'Invalid timeout'}), 400
+
+    if since_seq is not None and timeout > 0:
+        completion_events.wait(since_seq, timeout)
+    with batch_status_lock:
+        seq = completion_events.last_seq
+        completed, last_reply = global_completion_status, global_last_reply
+    version = f"{completion_events.epoch}-{seq}"
+
+    if since_seq == seq:
+        response = Response(status=304)
+        response.set_etag(version)
+        return response
+
+    body = {'completed': completed, 'last_reply': last_reply, 'version': version}
+    if since is not None:
+        events, complete = completion_events.since(since_seq if since_seq is not None else -1)
+        body['events'] = [{'version': f"{completion_events.epoch}-{e['seq']}", 'type': e['type'], 'time': e['time'], **e['data']}
+                          for e in events if e['seq'] <= seq]
+        # False when the client's version is from another run or too old for the retained history
+        body['complete'] = complete and since_seq is not None
+    response = jsonify(body)
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/chat')
 @limiter.exempt
@@ -892,11 +1111,74 @@ def get_icon():
     
     if '?' in project_path:
         project_path = project_path.split('?')[0]
-        
-    icon_path = find_project_icon(project_path)
-    if icon_path and os.path.exists(icon_path):
-        return send_file(icon_path, mimetype='image/x-icon')
-    return abort(404)
+
+    size = request.args.get('size', type=int)
+    if size:
+        # A small PNG/WebP at the size the page displays, instead of every resolution in the .ico
+        size = min(max(size, 16), 256)
+        fmt = 'WEBP' if request.accept_mimetypes['image/webp'] else 'PNG'
+        try:
+            transcoded = icon_sprites.transcoded(project_path, size, fmt)
+        except Exception as e:
+            logger.error(f"Error transcoding icon for {project_path}: {e}")
+            transcoded = None
+        if transcoded is None:
+            return abort(404)
+        response = Response(transcoded[0], mimetype=f"image/{fmt.lower()}")
+        response.set_etag(transcoded[1])
+        response.cache_control.public = True
+        response.cache_control.max_age = ICON_MAX_AGE_SECONDS
+        response.vary.add('Accept')
+        return response.make_conditional(request)
+
+    try:
+        icon = icon_index.load(project_path)
+    except OSError as e:
+        logger.error(f"Error reading icon for {project_path}: {e}")
+        icon = None
+    if icon is None:
+        return abort(404)
+
+    # Served from memory; browsers revalidate with If-None-Match / If-Modified-Since and get a 304
+    response = Response(icon.data, mimetype='image/x-icon')
+    response.set_etag(icon.etag)
+    response.last_modified = icon.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = ICON_MAX_AGE_SECONDS
+    return response.make_conditional(request)
+
+@app.route('/api/icon_sprite')
+@limiter.exempt
+def icon_sprite():
+    """
+    Every project icon in one image. Pages link it as /api/icon_sprite?v=<version>; that URL
+    never changes content, so browsers keep it for a year and a new version gets a new URL.
+    """
+    fmt = 'WEBP' if request.accept_mimetypes['image/webp'] else 'PNG'
+    sheet = icon_sprites.sheet(fmt)
+    if sheet is None:
+        icon_sprites.request_refresh()
+        return abort(404)
+    version, data = sheet
+    response = Response(data, mimetype=f"image/{fmt.lower()}")
+    response.set_etag(f"{version}-{fmt.lower()}")
+    response.cache_control.public = True
+    if request.args.get('v') == version:
+        response.cache_control.max_age = ICON_SPRITE_MAX_AGE_SECONDS
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = 0
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+@app.route('/api/icon_sprite/map')
+@limiter.exempt
+def icon_sprite_map():
+    """Cell coordinates ([column, row]) of each project path in the current sprite sheet."""
+    sprite = icon_sprites.current_map()
+    if sprite is None:
+        return jsonify({'version': None, 'icons': {}}), 202
+    return jsonify(dict(sprite, url=f"/api/icon_sprite?v={sprite['version']}", stats=icon_sprites.get_stats()))
 
 @app.route('/launch', methods=['POST'])
 @limiter.exempt
@@ -926,7 +1208,6 @@ def focus():
 @app.route('/send_message', methods=['POST'])
 @limiter.limit("20 per minute")
 def send_message():
-    global global_completion_status, global_last_reply, system_busy
     data = request.json
     message = data.get('message')
     
@@ -934,9 +1215,8 @@ def send_message():
         return jsonify({'status': 'error', 'message': 'Message cannot be empty'}), 400
 
     try:
-        system_busy = True
-        global_completion_status = False
-        global_last_reply = ""
+        task_scheduler.mark_busy()
+        set_batch_status('reset', False, "")
         add_chat_message('user', message)
         process_optimisewait_message(message, debug=(terminal_log_level == 'debug'))
         return jsonify({'status': 'success', 'message': 'Message processed'})
@@ -948,15 +1228,19 @@ def send_message():
 @limiter.exempt
 def ignore_project():
     project_path = request.json.get('path')
-    if project_path:
-        save_ignored_folder(project_path)
+    if not project_path:
+        return jsonify({'status': 'error', 'message': 'Invalid path'}), 400
+    try:
+        ignore_registry.add(project_path)
         return jsonify({'status': 'success', 'message': 'Project ignored'})
-    return jsonify({'status': 'error', 'message': 'Invalid path'}), 400
+    except OSError as e:
+        logger.error(f"Failed to ignore project: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/ignored', methods=['GET'])
 @limiter.exempt
 def get_ignored_route():
-    return jsonify(load_ignored_folders())
+    return jsonify(ignore_registry.paths())
 
 @app.route('/api/unignore', methods=['POST'])
 @limiter.exempt
@@ -965,14 +1249,8 @@ def unignore_project_route():
     if not project_path:
         return jsonify({'status': 'error', 'message': 'Invalid path'}), 400
     
-    ignored = load_ignored_folders()
-    norm_target = os.path.normcase(os.path.normpath(project_path))
-    new_ignored = [p for p in ignored if os.path.normcase(os.path.normpath(p)) != norm_target]
-    
     try:
-        ignored_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ignored_folders.json')
-        with open(ignored_file_path, 'w', encoding='utf-8') as f:
-            json.dump(new_ignored, f, indent=4)
+        ignore_registry.remove(project_path)
         return jsonify({'status': 'success', 'message': 'Project unignored'})
     except Exception as e:
         logger.error(f"Failed to unignore project: {e}")
@@ -1028,6 +1306,10 @@ def restart_server():
                 command = f'sleep 2 && "{sys.executable}" "{script_path}"'
                 subprocess.Popen(command, shell=True)
             
+            # Make sure queued tasks are on disk; the new process picks them up from the journal
+            if not task_scheduler.journal.flush():
+                logger.error("Queue journal could not be written; queued tasks may be lost on restart.")
+
             # Terminate the current application
             os._exit(0)
 
@@ -1070,25 +1352,87 @@ def api_projects_list():
 @limiter.exempt
 @csrf.exempt
 def api_queue():
-    global task_queue, current_queue_task, system_busy
     if request.method == 'GET':
-        return jsonify({'queue': task_queue, 'current': current_queue_task, 'system_busy': system_busy})
+        queue, lanes, busy = task_scheduler.snapshot()
+        return jsonify({'queue': queue, 'lanes': lanes, 'current': running_task(lanes), 'system_busy': busy,
+                        'stats': dict(task_scheduler.get_stats(), journal=task_scheduler.journal.get_stats(),
+                                      input_device=input_device.get_stats())})
     elif request.method == 'POST':
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Invalid request'}), 400
+        try:
+            priority, deadline_seconds = parse_schedule(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         task = {
             'id': secrets.token_hex(8),
             'project_path': data.get('project_path'),
             'project_name': data.get('project_name'),
-            'message': data.get('message')
+            'message': data.get('message'),
+            'priority': priority
         }
-        with queue_lock:
-            task_queue.append(task)
-            
-        if current_queue_task is None:
-            threading.Thread(target=process_next_queue_item, daemon=True).start()
-            
+        if deadline_seconds:
+            task['deadline_seconds'] = deadline_seconds
+        task_scheduler.enqueue(task)
         return jsonify({'status': 'success', 'task': task})
 
+@app.route('/api/queue/bulk', methods=['POST'])
+@limiter.exempt
+@csrf.exempt
+def api_queue_bulk():
+    """
+    Fans one message out to many projects in a single request. The body carries a
+    `message` template ({project_name}, {project_path}, {index} and {count} are filled in
+    per project), `project_paths` and/or a `filter` ({all, name, path_prefix, exclude}),
+    plus optional `priority`, `deadline_minutes` and `skip_invalid`. Either every task is
+    queued or none is.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Invalid request'}), 400
+    try:
+        tasks, skipped = build_bulk_tasks(data, get_visible_projects())
+    except BulkQueueError as e:
+        return jsonify({'success': False, 'error': str(e), 'invalid': e.invalid}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    task_scheduler.enqueue_many(tasks)
+    logger.info(f"Queued one message for {len(tasks)} project(s).")
+    return jsonify({'status': 'success', 'count': len(tasks), 'task_ids': [task['id'] for task in tasks], 'skipped': skipped})
+
+@app.route('/api/response_cache', methods=['GET', 'POST'])
+@limiter.exempt
+def response_cache_route():
+    global config
+    if request.method == 'GET':
+        return jsonify(response_cache.get_stats())
+
+    try:
+        data = request.get_json()
+        if data is None:
+            return jsonify({'success': False, 'error': 'Invalid request'}), 400
+
+        if data.get('clear'):
+            response_cache.clear()
+        if 'enabled' in data:
+            config['response_cache_enabled'] = str(bool(data['enabled']))
+        if 'ttl_seconds' in data:
+            config['response_cache_ttl_seconds'] = str(int(data['ttl_seconds']))
+        if 'max_entries' in data:
+            config['response_cache_max_entries'] = str(int(data['max_entries']))
+        if 'max_mb' in data:
+            config['response_cache_max_mb'] = str(float(data['max_mb']))
+
+        response_cache.configure(**get_response_cache_settings())
+        write_config(config)
+        logger.info(f"Response cache {'enabled' if response_cache.enabled else 'disabled'}")
+        return jsonify({'success': True, **response_cache.get_stats()})
+    except Exception as e:
+        logger.error(f"Error updating response cache: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/timeout', methods=['POST'])
 @limiter.exempt
 def set_timeout():
@@ -1097,6 +1441,7 @@ def set_timeout():
         data = request.get_json()
         timeout = int(data.get('timeout', 5))
         config['queue_timeout_minutes'] = str(timeout)
+        task_scheduler.set_timeout(timeout * 60)
         write_config(config)
         logger.info(f"Queue wait timeout set to: {timeout} minutes")
         return jsonify({'success': True, 'timeout': timeout})
@@ -1104,6 +1449,56 @@ def set_timeout():
         logger.error(f"Error setting timeout: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/queue/events', methods=['GET'])
+@limiter.exempt
+def api_queue_events():
+    # EventSource resends the last id it saw as Last-Event-ID when it reconnects
+    since = parse_event_id(request.args.get('since') or request.headers.get('Last-Event-ID'), queue_events)
+    return Response(stream_queue_events(since), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics_route():
+    return Response(task_metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/metrics', methods=['GET'])
+@limiter.exempt
+def api_metrics():
+    return jsonify(dict(task_metrics.registry.summary(), queue=task_scheduler.get_stats()))
+
+@app.route('/api/queue/cancel', methods=['POST'])
+@limiter.exempt
+@csrf.exempt
+def cancel_queue_task():
+    data = request.get_json(silent=True) or {}
+    result = task_scheduler.cancel(data.get('id'))
+    if result is None:
+        return jsonify({'success': False, 'error': 'Task not found'}), 404
+    logger.info(f"Queue task {data.get('id')} {'removed from the queue' if result == 'removed' else 'cancelled'}")
+    return jsonify({'success': True, 'status': result})
+
+@app.route('/api/queue/policy', methods=['POST'])
+@limiter.exempt
+def set_queue_policy():
+    global config
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Invalid request'}), 400
+        try:
+            window = parse_affinity_window(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        config['queue_affinity_window'] = str(window)
+        task_scheduler.set_affinity_window(window)
+        write_config(config)
+        logger.info(f"Queue affinity window set to: {window} tasks")
+        return jsonify({'success': True, 'affinity_window': window})
+    except Exception as e:
+        logger.error(f"Error setting queue policy: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 ngrok_tunnel = None
 
 if __name__ == '__main__':
@@ -1147,6 +1542,9 @@ if __name__ == '__main__':
         APP_PATH=APP_PATH
     )
     
+    task_scheduler.recover()
+    icon_sprites.request_refresh()
+
     try:
         app.run(host="0.0.0.0", port=3001)
     except Exception as e:
@@ -0,0 +1,120 @@
+import os
+import re
+import secrets
+import fnmatch
+from modules.task_queue import parse_schedule
+
+MAX_BULK_TASKS = 1000
+
+# Placeholders a bulk message may use; anything else in braces (code, JSON) is left alone
+PLACEHOLDER_RE = re.compile(r'\{(project_name|project_path|index|count)\}')
+
+class BulkQueueError(ValueError):
+    """A bulk submission that cannot be enqueued; `invalid` lists the offending project paths."""
+    def __init__(self, message, invalid=None):
+        super().__init__(message)
+        self.invalid = invalid or []
+
+def _check_paths(value, field):
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(path, str) for path in value):
+        raise BulkQueueError(f"'{field}' must be a list of path strings")
+    return value
+
+def _norm(path):
+    return os.path.normcase(os.path.normpath(path))
+
+def render_message(template, project_path, index, count):
+    values = {
+        'project_name': os.path.basename(project_path),
+        'project_path': project_path,
+        'index': str(index),
+        'count': str(count),
+    }
+    return PLACEHOLDER_RE.sub(lambda match: values[match.group(1)], template)
+
+def select_projects(project_index, project_paths=None, filters=None):
+    """
+    Resolves explicit paths and/or a filter against the project index (a list of paths).
+    Returns (selected, invalid): selected paths in request order without duplicates, and
+    requested paths that are not known projects.
+
+    `filters` may hold 'all' (every project), 'name' (a case-insensitive glob on the folder
+    name), 'path_prefix' and 'exclude' (a list of paths). Raises BulkQueueError if either
+    argument has the wrong shape.
+    """
+    project_paths = _check_paths(project_paths, 'project_paths')
+    if filters is not None and not isinstance(filters, dict):
+        raise BulkQueueError("'filter' must be an object")
+    filters = filters or {}
+    for field in ('name', 'path_prefix'):
+        if filters.get(field) is not None and not isinstance(filters[field], str):
+            raise BulkQueueError(f"'filter.{field}' must be a string")
+    exclude = _check_paths(filters.get('exclude'), 'filter.exclude')
+
+    known = {_norm(path): path for path in project_index}
+    selected = {}
+    invalid = []
+
+    for path in project_paths:
+        key = _norm(path) if path else ''
+        if key in known:
+            selected.setdefault(key, known[key])
+        else:
+            invalid.append(path)
+
+    if filters:
+        name = (filters.get('name') or '').lower()
+        prefix = _norm(filters['path_prefix']) if filters.get('path_prefix') else ''
+        if filters.get('all') or name or prefix:
+            for key, path in known.items():
+                if name and not fnmatch.fnmatchcase(os.path.basename(path).lower(), name):
+                    continue
+                # Match whole path components: a prefix of C:\work\app must not pick C:\work\apple
+                if prefix and key != prefix and not key.startswith(prefix.rstrip(os.sep) + os.sep):
+                    continue
+                selected.setdefault(key, path)
+        for path in exclude:
+            selected.pop(_norm(path), None)
+
+    return list(selected.values()), invalid
+
+def build_bulk_tasks(data, project_index):
+    """
+    Turns a bulk request into queue tasks, one per selected project, with the message
+    template rendered for each. Raises BulkQueueError if the request is unusable or names
+    unknown projects (unless 'skip_invalid' is set). Returns (tasks, skipped paths).
+    """
+    template = data.get('message') or ''
+    if not isinstance(template, str):
+        raise BulkQueueError("'message' must be a string")
+    template = template.strip()
+    if not template:
+        raise BulkQueueError("Message cannot be empty")
+
+    selected, invalid = select_projects(project_index, data.get('project_paths'), data.get('filter'))
+    if invalid and not data.get('skip_invalid'):
+        raise BulkQueueError(f"{len(invalid)} project path(s) are not in the project index", invalid)
+    if not selected:
+        raise BulkQueueError("No projects matched", invalid)
+    if len(selected) > MAX_BULK_TASKS:
+        raise BulkQueueError(f"{len(selected)} projects matched; at most {MAX_BULK_TASKS} can be queued at once")
+
+    try:
+        priority, deadline_seconds = parse_schedule(data)
+    except ValueError as e:
+        raise BulkQueueError(str(e))
+    tasks = []
+    for index, path in enumerate(selected, 1):
+        task = {
+            'id': secrets.token_hex(8),
+            'project_path': path,
+            'project_name': os.path.basename(path),
+            'message': render_message(template, path, index, len(selected)),
+            'priority': priority
+        }
+        if deadline_seconds:
+            task['deadline_seconds'] = deadline_seconds
+        tasks.append(task)
+    return tasks, invalid
@@ -1,9 +1,6 @@
 import win32clipboard
 import pywintypes
 import time
-import base64
-import io
-from PIL import Image
 
 def set_clipboard(text, retries=3, delay=0.2, debug=False):
     for i in range(retries):
@@ -28,14 +25,9 @@ def set_clipboard(text, retries=3, delay=0.2, debug=False):
     if debug:
         print(f"Failed to set clipboard after {retries} attempts.")
 
-def set_clipboard_image(image_data, debug=False):
+def set_clipboard_dib(data, debug=False):
+    """Places already-converted CF_DIB bytes on the clipboard."""
     try:
-        binary_data = base64.b64decode(image_data.split(',')[1])
-        image = Image.open(io.BytesIO(binary_data))
-        output = io.BytesIO()
-        image.convert("RGB").save(output, "BMP")
-        data = output.getvalue()[14:]
-        output.close()
         win32clipboard.OpenClipboard()
         win32clipboard.EmptyClipboard()
         win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
@@ -44,4 +36,4 @@ def set_clipboard_image(image_data, debug=False):
     except Exception as e:
         if debug:
             print(f"Error setting image to clipboard: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,55 @@
+import time
+import threading
+from collections import deque
+
+DEFAULT_CAPACITY = 1000
+
+class EventLog:
+    """
+    Bounded, sequence-numbered event log. Publishers append events; readers ask for
+    everything after the last sequence number they saw and can block until something new
+    arrives. When a reader falls further behind than the log's capacity, `since()` reports
+    that the history is incomplete so it can fall back to a full snapshot.
+
+    `epoch` changes every time the process starts, so a sequence number remembered from a
+    previous run is never mistaken for one from this run.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.epoch = format(int(time.time() * 1000), 'x')
+        self._events = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    @property
+    def last_seq(self):
+        with self._cond:
+            return self._seq
+
+    def publish(self, kind, **data):
+        with self._cond:
+            self._seq += 1
+            event = {'seq': self._seq, 'type': kind, 'time': time.time(), 'data': data}
+            self._events.append(event)
+            self._cond.notify_all()
+            return event
+
+    def _since(self, seq):
+        if seq > self._seq:
+            return [], False
+        if seq == self._seq:
+            return [], True
+        first = self._events[0]['seq'] if self._events else self._seq + 1
+        if seq < first - 1:
+            return list(self._events), False
+        return list(self._events)[seq - first + 1:], True
+
+    def since(self, seq):
+        """Returns (events after `seq`, complete); complete is False if some were already dropped."""
+        with self._cond:
+            return self._since(seq)
+
+    def wait(self, seq, timeout=None):
+        """Like since(), but blocks up to `timeout` seconds until there is at least one new event."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != seq, timeout)
+            return self._since(seq)
@@ -0,0 +1,191 @@
+import io
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from PIL import Image
+from modules.vscode_utils import icon_index, path_prober
+
+logger = logging.getLogger(__name__)
+
+# Pixels per sprite cell; the templates show icons at 20-40 CSS px, so this stays sharp at 2x
+SPRITE_CELL = 64
+REFRESH_INTERVAL = 5.0
+MAX_TRANSCODED = 512
+
+def fit_icon(data, size):
+    """Decodes an icon (ICO, PNG, ...) and returns it as a size x size RGBA image, centred."""
+    with Image.open(io.BytesIO(data)) as image:
+        if image.format == 'ICO':
+            # An .ico can embed several resolutions; decode only the smallest one that is big enough
+            sizes = sorted(image.info.get('sizes') or (), key=min)
+            best = next((s for s in sizes if min(s) >= size), sizes[-1] if sizes else None)
+            if best:
+                try:
+                    image.size = best
+                except Exception:
+                    pass
+        icon = image.convert('RGBA')
+    icon.thumbnail((size, size), Image.LANCZOS)
+    cell = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    cell.paste(icon, ((size - icon.width) // 2, (size - icon.height) // 2))
+    return cell
+
+def encode_image(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, format='WEBP', lossless=True, method=4)
+    else:
+        image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+class IconSprites:
+    """
+    Transcodes project icons once (keyed by the icon's content hash) and packs them into
+    a single sprite sheet with a map of cell coordinates per project path. Builds run on a
+    background thread, at most every `refresh_interval` seconds; requests are served from
+    the last finished sheet, whose `version` changes whenever any icon does.
+    """
+    def __init__(self, projects_fn, cell=SPRITE_CELL, refresh_interval=REFRESH_INTERVAL):
+        self.projects_fn = projects_fn
+        self.cell = cell
+        self.refresh_interval = refresh_interval
+        self._cond = threading.Condition()
+        self._cells = {}
+        self._transcoded = OrderedDict()
+        self._sprite = None
+        self._wanted = False
+        self._last_build = 0.0
+        self._thread = None
+        self.stats = {'builds': 0, 'unchanged': 0, 'transcodes': 0, 'errors': 0, 'build_ms_last': 0.0}
+
+    def request_refresh(self):
+        with self._cond:
+            self._wanted = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="icon-sprites", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._wanted)
+                delay = self._last_build + self.refresh_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._cond:
+                self._wanted = False
+                self._last_build = time.monotonic()
+            try:
+                self._build()
+            except Exception as e:
+                logger.error(f"Error building icon sprite sheet: {e}")
+
+    def _cell_image(self, icon):
+        image = self._cells.get(icon.etag)
+        if image is None:
+            image = fit_icon(icon.data, self.cell)
+            self.stats['transcodes'] += 1
+        return image
+
+    def _build(self):
+        start = time.perf_counter()
+        icons = []
+        unavailable = path_prober.unavailable()
+        for path in self.projects_fn():
+            if path in unavailable:
+                continue
+            try:
+                icon = icon_index.load(path)
+            except OSError:
+                continue
+            if icon is not None:
+                icons.append((path, icon))
+
+        version = hashlib.sha1('\n'.join(f"{path}\0{icon.etag}" for path, icon in icons).encode('utf-8')).hexdigest()[:12]
+        current = self._sprite
+        if current is not None and current['version'] == version:
+            self.stats['unchanged'] += 1
+            return
+
+        # Projects sharing an icon share a cell
+        cells = OrderedDict()
+        for path, icon in icons:
+            if icon.etag in cells:
+                continue
+            try:
+                cells[icon.etag] = self._cell_image(icon)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.debug(f"Could not decode icon {icon.path}: {e}")
+        self._cells = dict(cells)
+
+        columns = max(1, math.ceil(math.sqrt(len(cells))))
+        rows = max(1, math.ceil(len(cells) / columns))
+        sheet = Image.new('RGBA', (columns * self.cell, rows * self.cell), (0, 0, 0, 0))
+        positions = {}
+        for n, (etag, image) in enumerate(cells.items()):
+            positions[etag] = [n % columns, n // columns]
+            sheet.paste(image, (positions[etag][0] * self.cell, positions[etag][1] * self.cell))
+
+        sprite = {
+            'version': version,
+            'cell': self.cell,
+            'columns': columns,
+            'rows': rows,
+            'icons': {path: positions[icon.etag] for path, icon in icons if icon.etag in positions},
+            'image': sheet,
+            'encoded': {'PNG': encode_image(sheet, 'PNG')}
+        }
+        with self._cond:
+            self._sprite = sprite
+        self.stats['builds'] += 1
+        self.stats['build_ms_last'] = round((time.perf_counter() - start) * 1000, 1)
+        logger.debug(f"Built icon sprite {version}: {len(sprite['icons'])} project(s), {len(cells)} icon(s).")
+
+    def current_map(self):
+        """Coordinates of the latest sheet (None before the first build); also schedules a refresh."""
+        if self._sprite is None or time.monotonic() - self._last_build >= self.refresh_interval:
+            self.request_refresh()
+        sprite = self._sprite
+        if sprite is None:
+            return None
+        return {key: sprite[key] for key in ('version', 'cell', 'columns', 'rows', 'icons')}
+
+    def sheet(self, fmt='PNG'):
+        """(version, encoded bytes) of the latest sheet in PNG or WEBP, or None."""
+        sprite = self._sprite
+        if sprite is None:
+            return None
+        data = sprite['encoded'].get(fmt)
+        if data is None:
+            data = sprite['encoded'][fmt] = encode_image(sprite['image'], fmt)
+        return sprite['version'], data
+
+    def transcoded(self, project_path, size, fmt='PNG'):
+        """One project's icon as `size`-pixel PNG/WEBP bytes plus its etag, cached by content; or None."""
+        icon = icon_index.load(project_path)
+        if icon is None:
+            return None
+        key = (icon.etag, size, fmt)
+        with self._cond:
+            data = self._transcoded.get(key)
+            if data is not None:
+                self._transcoded.move_to_end(key)
+                return data, f"{icon.etag}-{size}-{fmt.lower()}"
+        data = encode_image(fit_icon(icon.data, size), fmt)
+        with self._cond:
+            self.stats['transcodes'] += 1
+            self._transcoded[key] = data
+            while len(self._transcoded) > MAX_TRANSCODED:
+                self._transcoded.popitem(last=False)
+        return data, f"{icon.etag}-{size}-{fmt.lower()}"
+
+    def get_stats(self):
+        sprite = self._sprite
+        return dict(self.stats, version=sprite['version'] if sprite else None,
+                    projects=len(sprite['icons']) if sprite else 0,
+                    png_bytes=len(sprite['encoded']['PNG']) if sprite else 0)
@@ -0,0 +1,129 @@
+import io
+import base64
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from modules.prompt_utils import image_digest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PIXELS = 4_000_000  # a little above 2560x1440
+DEFAULT_CACHE_ENTRIES = 32
+DIB_CACHE_ENTRIES = 4
+
+# data_uri: what the model receives (the original URI unless it was downscaled)
+IngestedImage = namedtuple('IngestedImage', ['digest', 'data_uri', 'width', 'height', 'downscaled'])
+
+def image_to_dib(image):
+    """Converts a PIL image to CF_DIB clipboard bytes (a BMP without its 14-byte file header)."""
+    output = io.BytesIO()
+    image.convert("RGB").save(output, "BMP")
+    return output.getvalue()[14:]
+
+def _open(data_uri):
+    header, _, payload = data_uri.partition(',')
+    return Image.open(io.BytesIO(base64.b64decode(payload)))
+
+class ImageIngestor:
+    """
+    Prepares inline data-URI images for the model once: in parallel, downscaled to a pixel
+    budget, and cached by content hash so a screenshot repeated across turns is never
+    looked at again. Only an oversized image is decoded in full; for the rest the header is
+    enough. Clipboard bitmaps are built on demand with `clipboard_dib()`, for the one image
+    that is pasted, rather than for every image in the conversation.
+    """
+    def __init__(self, max_pixels=DEFAULT_MAX_PIXELS, cache_entries=DEFAULT_CACHE_ENTRIES, max_workers=4):
+        self.max_pixels = int(max_pixels)
+        self.cache_entries = max(1, int(cache_entries))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-ingest")
+        self._cache = OrderedDict()
+        self._dibs = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'decoded': 0, 'cache_hits': 0, 'downscaled': 0, 'failed': 0, 'dibs': 0, 'dib_cache_hits': 0}
+
+    def _decode(self, data_uri, digest):
+        image = _open(data_uri)
+        # Opening only parses the header; pixels are decoded if the image has to be resized
+        width, height = image.size
+        downscaled = self.max_pixels > 0 and width * height > self.max_pixels
+        if downscaled:
+            scale = (self.max_pixels / float(width * height)) ** 0.5
+            image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, "PNG", optimize=False)
+            data_uri = "data:image/png;base64," + base64.b64encode(output.getvalue()).decode('ascii')
+        return IngestedImage(digest, data_uri, image.size[0], image.size[1], downscaled)
+
+    def _ingest_one(self, data_uri, digest):
+        try:
+            ingested = self._decode(data_uri, digest)
+        except Exception as e:
+            logger.error(f"Failed to decode inline image: {e}")
+            with self._lock:
+                self.stats['failed'] += 1
+            return IngestedImage(digest, data_uri, 0, 0, False)
+        with self._lock:
+            self.stats['decoded'] += 1
+            if ingested.downscaled:
+                self.stats['downscaled'] += 1
+            self._cache[digest] = ingested
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return ingested
+
+    def ingest(self, data_uris, digests=None):
+        """Returns an IngestedImage for every data URI, in the same order."""
+        if digests is None:
+            digests = [image_digest(uri) for uri in data_uris]
+        results = [None] * len(data_uris)
+        pending = {}
+        with self._lock:
+            for i, digest in enumerate(digests):
+                cached = self._cache.get(digest)
+                if cached is not None:
+                    self._cache.move_to_end(digest)
+                    self.stats['cache_hits'] += 1
+                    results[i] = cached
+                elif digest not in pending:
+                    pending[digest] = i
+        futures = {digest: self._executor.submit(self._ingest_one, data_uris[i], digest) for digest, i in pending.items()}
+        for i, digest in enumerate(digests):
+            if results[i] is None:
+                results[i] = futures[digest].result()
+        return results
+
+    def clipboard_dib(self, ingested):
+        """CF_DIB bytes for an ingested image (as the model sees it), or None if it cannot be decoded."""
+        with self._lock:
+            dib = self._dibs.get(ingested.digest)
+            if dib is not None:
+                self._dibs.move_to_end(ingested.digest)
+                self.stats['dib_cache_hits'] += 1
+                return dib
+        try:
+            dib = image_to_dib(_open(ingested.data_uri))
+        except Exception as e:
+            logger.error(f"Failed to convert image for the clipboard: {e}")
+            with self._lock:
+                self.stats['failed'] += 1
+            return None
+        with self._lock:
+            self.stats['dibs'] += 1
+            self._dibs[ingested.digest] = dib
+            while len(self._dibs) > DIB_CACHE_ENTRIES:
+                self._dibs.popitem(last=False)
+        return dib
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, cached=len(self._cache), max_pixels=self.max_pixels)
+
+def count_images(content):
+    """Number of inline data-URI image parts in a single message's content."""
+    if not isinstance(content, list):
+        return 0
+    return sum(1 for item in content
+               if isinstance(item, dict) and item.get('type') == 'image_url'
+               and str(item.get('image_url', {}).get('url', '')).startswith('data:image'))
@@ -0,0 +1,41 @@
+import time
+import threading
+from contextlib import contextmanager
+
+class InputDeviceLock:
+    """
+    The one truly exclusive resource on the workstation: focus, clipboard, keyboard and
+    mouse. Queue lanes hold it only for focus, paste and enter, so one lane's window
+    wait and settle pause overlap with another lane's automation. A browser backend holds
+    it for its whole round trip: talktollm watches the chat tab on screen until the answer
+    is done and reads it back through the clipboard, so the screen cannot be shared.
+    Re-entrant, so a caller that already holds it can call helpers that take it too.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self.stats = {}
+
+    @contextmanager
+    def hold(self, purpose):
+        requested = time.monotonic()
+        with self._lock:
+            acquired = time.monotonic()
+            try:
+                yield
+            finally:
+                released = time.monotonic()
+                with self._stats_lock:
+                    stats = self.stats.setdefault(purpose, {'holds': 0, 'wait_seconds': 0.0, 'hold_seconds': 0.0, 'max_wait_seconds': 0.0})
+                    stats['holds'] += 1
+                    stats['wait_seconds'] += acquired - requested
+                    stats['hold_seconds'] += released - acquired
+                    stats['max_wait_seconds'] = max(stats['max_wait_seconds'], acquired - requested)
+
+    def get_stats(self):
+        with self._stats_lock:
+            return {purpose: {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+                    for purpose, stats in self.stats.items()}
+
+# Shared by the queue runner, manual messages and the browser backends
+input_device = InputDeviceLock()
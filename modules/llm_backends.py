@@ -0,0 +1,379 @@
+import abc
+import math
+import time
+import hashlib
+import logging
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from modules.pacing import PacingScheduler
+from modules.input_lock import input_device
+
+try:
+    from talktollm import talkto
+except ImportError:
+    talkto = None
+
+logger = logging.getLogger(__name__)
+
+# Models driven through browser automation via talktollm, in the order shown to users
+BROWSER_MODELS = ['deepseek', 'gemini', 'aistudio', 'aistudio_flash', 'gemini-3.1-flash-lite-preview']
+FAKE_MODEL = 'fake'
+
+DEFAULT_CONCURRENCY = 1
+DEFAULT_MAX_PENDING = 8
+DEFAULT_MIN_INTERVAL = 5
+
+# Shared by all backends; each model is paced on its own bucket
+pacer = PacingScheduler()
+
+class BackendBusyError(Exception):
+    """Raised when a backend's pending-request bound is exhausted."""
+
+class ResponseStream:
+    """
+    Thread-safe, append-only buffer for a model response that is still being generated.
+    Any number of readers can iterate it while the producer appends chunks.
+    """
+    def __init__(self, tracker=None):
+        self._chunks = []
+        self._cond = threading.Condition()
+        self.tracker = tracker
+        self.done = False
+        self.error = None
+        self.queue_delay = 0.0
+        self._done_callbacks = []
+
+    @classmethod
+    def completed(cls, text, tracker=None):
+        """Returns an already-closed stream that replays `text` line by line."""
+        response_stream = cls(tracker=tracker)
+        for line in text.splitlines(True):
+            response_stream.append(line)
+        response_stream.close()
+        return response_stream
+
+    def append(self, chunk):
+        if not chunk:
+            return
+        with self._cond:
+            self._chunks.append(chunk)
+            if self.tracker is not None:
+                self.tracker.feed(chunk)
+            self._cond.notify_all()
+
+    def close(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            if self.tracker is not None:
+                self.tracker.close()
+            self._cond.notify_all()
+            callbacks, self._done_callbacks = self._done_callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Response stream callback failed: {e}", exc_info=True)
+
+    def add_done_callback(self, callback):
+        """Calls `callback(self)` once the stream closes, or immediately if it already has."""
+        with self._cond:
+            if not self.done:
+                self._done_callbacks.append(callback)
+                return
+        callback(self)
+
+    def iter_chunks(self, keepalive=None):
+        """
+        Yields chunks as they arrive. If `keepalive` seconds pass without new output,
+        yields None so the caller can keep its connection alive.
+        """
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self._chunks) and not self.done:
+                    self._cond.wait(keepalive)
+                pending = self._chunks[index:]
+                index += len(pending)
+                finished = self.done and index >= len(self._chunks)
+            if pending:
+                yield from pending
+            elif finished:
+                return
+            else:
+                yield None
+
+    def text(self):
+        with self._cond:
+            return "".join(self._chunks)
+
+    def result(self, timeout=None):
+        """Blocks until the response is complete and returns its full text."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.done, timeout):
+                raise TimeoutError("Timed out waiting for the model response")
+            if self.error is not None:
+                raise self.error
+            return "".join(self._chunks)
+
+class LLMBackend(abc.ABC):
+    """
+    Base class for a model backend. Each backend owns a bounded worker pool, so requests
+    for different models run in parallel while each model keeps its own concurrency limit.
+    """
+    # True for backends that need the shared mouse / keyboard / clipboard while they run
+    input_bound = False
+
+    def __init__(self, name, concurrency=DEFAULT_CONCURRENCY, max_pending=DEFAULT_MAX_PENDING, min_interval=DEFAULT_MIN_INTERVAL):
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.max_pending = max(self.concurrency, int(max_pending))
+        self.min_interval = max(0.0, float(min_interval))
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"llm-{name}")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats_lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'active': 0}
+
+    @abc.abstractmethod
+    def complete(self, prompt, images, debug=False):
+        """Runs one prompt through the model and returns the full response text."""
+
+    def stream(self, prompt, images, debug=False):
+        """
+        Yields the response in chunks as the model produces it. Backends that can only
+        return the finished text yield it once.
+        """
+        yield self.complete(prompt, images, debug=debug)
+
+    def _bump(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+
+    def _run(self, fn, *args, **kwargs):
+        self._bump(active=1)
+        try:
+            result = fn(*args, **kwargs)
+            self._bump(completed=1)
+            return result
+        except Exception:
+            self._bump(failed=1)
+            raise
+        finally:
+            self._bump(active=-1)
+            self._slots.release()
+
+    def _produce(self, response_stream, prompt, images, debug, on_complete, prepare):
+        try:
+            # Browser backends drive the mouse, keyboard and clipboard for the whole call
+            with input_device.hold(self.name) if self.input_bound else nullcontext():
+                if prepare is not None:
+                    prepare()
+                for chunk in self.stream(prompt, images, debug=debug):
+                    response_stream.append(chunk)
+        except Exception as e:
+            logger.error(f"Backend '{self.name}' failed: {e}")
+            response_stream.close(error=e)
+            raise
+        response_stream.close()
+        if on_complete is not None:
+            try:
+                on_complete(response_stream)
+            except Exception as e:
+                logger.error(f"Error handling completed response from '{self.name}': {e}", exc_info=True)
+
+    def _submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            self._bump(rejected=1)
+            raise BackendBusyError(f"Backend '{self.name}' has {self.max_pending} requests pending")
+        self._bump(submitted=1)
+        try:
+            return self._executor.submit(self._run, fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _submit_paced(self, fn, *args, on_dispatch_error=None):
+        """
+        Like _submit, but starts the work no sooner than `min_interval` after this model's
+        previous start. Returns the queueing delay in seconds; the caller's thread never waits.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._bump(rejected=1)
+            raise BackendBusyError(f"Backend '{self.name}' has {self.max_pending} requests pending")
+        self._bump(submitted=1)
+        delay = pacer.reserve(self.name, self.min_interval)
+
+        def dispatch():
+            try:
+                self._executor.submit(self._run, fn, *args)
+            except Exception as e:
+                self._slots.release()
+                if on_dispatch_error is not None:
+                    on_dispatch_error(e)
+                raise
+        pacer.call_later(self.name, delay, dispatch)
+        return delay
+
+    def _complete_held(self, prompt, images, debug=False):
+        with input_device.hold(self.name) if self.input_bound else nullcontext():
+            return self.complete(prompt, images, debug=debug)
+
+    def submit(self, prompt, images, debug=False):
+        """Queues a completion on this backend's pool and returns a Future."""
+        return self._submit(self._complete_held, prompt, images, debug=debug)
+
+    def submit_stream(self, prompt, images, debug=False, tracker=None, on_complete=None, prepare=None):
+        """
+        Queues a completion and returns a ResponseStream that fills up as the model answers.
+        `prepare()` runs on the worker right before the model is called (inside the input-device
+        lock for browser backends, e.g. to put an image on the clipboard); `on_complete(response_stream)`
+        runs on the worker once the stream has closed successfully.
+        """
+        response_stream = ResponseStream(tracker=tracker)
+        response_stream.queue_delay = self._submit_paced(self._produce, response_stream, prompt, images, debug, on_complete, prepare,
+                                                         on_dispatch_error=lambda e: response_stream.close(error=e))
+        return response_stream
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats, name=self.name, concurrency=self.concurrency, max_pending=self.max_pending, min_interval=self.min_interval)
+        stats['pacing'] = pacer.get_stats(self.name)
+        return stats
+
+class TalkToBackend(LLMBackend):
+    """
+    Drives a web chat model through talktollm browser automation. talkto() pastes the
+    prompt, watches the tab on screen until the answer is finished and copies it out
+    through the clipboard in one call, so it holds the input device from start to end.
+    """
+    input_bound = True
+
+    def complete(self, prompt, images, debug=False):
+        # The caller (_produce or submit) already holds the input device
+        if talkto is None:
+            raise RuntimeError("'talktollm' is not installed; browser backends are unavailable.")
+        return talkto(self.name, prompt, images, debug=debug, humanize=True, windmouse=True)
+
+    def stream(self, prompt, images, debug=False):
+        """
+        Yields the whole answer as one chunk. talktollm has no partial-output hook: it only
+        gets the text by clicking the chat's Copy button once the answer is finished, so
+        browser models gain no time to first token from streaming. The SSE response still
+        opens at once and sends keep-alives while the model works.
+        """
+        yield self.complete(prompt, images, debug=debug)
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic in-process backend for measuring throughput without a browser.
+    The same prompt always produces the same response after `latency` seconds.
+    """
+    def __init__(self, name=FAKE_MODEL, concurrency=4, max_pending=64, latency=0.05, min_interval=0):
+        super().__init__(name, concurrency=concurrency, max_pending=max_pending, min_interval=min_interval)
+        self.latency = float(latency)
+
+    def _chunks(self, prompt, images):
+        digest = hashlib.sha256(prompt.encode('utf-8', 'surrogatepass')).hexdigest()[:12]
+        return [
+            "```\n",
+            "<thinking>\n<summary>Fake response ",
+            f"{digest} for a {len(prompt)} character prompt with {len(images)} image(s).</summary>\n</thinking>\n",
+            "<attempt_completion>\n<result>",
+            f"Fake completion {digest}.</result>\n</attempt_completion>\n",
+            "```"
+        ]
+
+    def stream(self, prompt, images, debug=False):
+        chunks = self._chunks(prompt, images)
+        for chunk in chunks:
+            if self.latency > 0:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+
+    def complete(self, prompt, images, debug=False):
+        return "".join(self.stream(prompt, images, debug=debug))
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def _config_number(config, key, model, default, cast=int):
+    """Reads a per-model override such as config['backend_concurrency']['gemini']."""
+    overrides = config.get(key)
+    if not isinstance(overrides, dict):
+        return default
+    try:
+        return cast(overrides.get(model, default))
+    except (TypeError, ValueError):
+        return default
+
+def get_min_interval(config, model):
+    """Per-model pacing interval from config['model_request_intervals'], falling back to 'min_request_interval'."""
+    if model == FAKE_MODEL:
+        default = 0.0
+    else:
+        try:
+            default = float(config.get('min_request_interval', DEFAULT_MIN_INTERVAL))
+        except (TypeError, ValueError):
+            default = DEFAULT_MIN_INTERVAL
+    return _config_number(config, 'model_request_intervals', model, default, cast=float)
+
+def parse_min_interval(value):
+    """Reads a pacing interval in seconds from a request body. Raises ValueError unless it is a finite number >= 0."""
+    try:
+        interval = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("'interval' must be a number")
+    if not math.isfinite(interval) or interval < 0:
+        raise ValueError("'interval' must be a non-negative number")
+    return interval
+
+def fake_backend_enabled(config):
+    return str(config.get('enable_fake_backend', 'False')).lower() == 'true'
+
+def init_backends(config):
+    """(Re)creates the backend registry from the configuration dictionary."""
+    global _backends
+    backends = {}
+    for model in BROWSER_MODELS:
+        backends[model] = TalkToBackend(
+            model,
+            concurrency=_config_number(config, 'backend_concurrency', model, DEFAULT_CONCURRENCY),
+            max_pending=_config_number(config, 'backend_max_pending', model, DEFAULT_MAX_PENDING),
+            min_interval=get_min_interval(config, model)
+        )
+    # The fake model answers with canned text, so it is only offered when asked for
+    if fake_backend_enabled(config):
+        backends[FAKE_MODEL] = FakeBackend(
+            concurrency=_config_number(config, 'backend_concurrency', FAKE_MODEL, 4),
+            max_pending=_config_number(config, 'backend_max_pending', FAKE_MODEL, 64),
+            latency=float(config.get('fake_backend_latency', 0.05)),
+            min_interval=get_min_interval(config, FAKE_MODEL)
+        )
+    with _backends_lock:
+        old, _backends = _backends, backends
+    for backend in old.values():
+        backend._executor.shutdown(wait=False)
+    logger.debug(f"Initialised LLM backends: {', '.join(f'{b.name} x{b.concurrency}' for b in backends.values())}")
+    return backends
+
+def register_backend(backend):
+    """Adds or replaces a single backend, e.g. a custom FakeBackend for benchmarking."""
+    with _backends_lock:
+        old = _backends.get(backend.name)
+        _backends[backend.name] = backend
+    if old is not None:
+        old._executor.shutdown(wait=False)
+    return backend
+
+def get_backend(model):
+    """Returns the backend registered for a model name, or None."""
+    return _backends.get(model)
+
+def available_models():
+    """Models that can be selected: the registered backends (the fake one only if enabled or registered)."""
+    return list(_backends.keys()) if _backends else list(BROWSER_MODELS)
+
+def get_backend_stats():
+    return [backend.get_stats() for backend in _backends.values()]
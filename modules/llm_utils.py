@@ -1,7 +1,14 @@
-from typing import Union, List, Dict
-from modules.clipboard_utils import set_clipboard_image
+import re
+from typing import Union, List, Dict, Optional
+
+# Cline's environment_details carries e.g. "# Current Working Directory (c:/Users/me/app) Files"
+WORKING_DIRECTORY_RE = re.compile(r'Current Working Directory \((.+?)\)(?: Files)?\s*$', re.MULTILINE)
 
 def get_content_text(content: Union[str, List[Dict[str, str]], Dict[str, str]], debug: bool = False) -> str:
+    """
+    Flattens a message's content to text. Images become placeholders here; they are decoded
+    once, later, by the image ingestion pipeline.
+    """
     if isinstance(content, str):
         return content
     elif isinstance(content, list):
@@ -10,9 +17,16 @@ def get_content_text(content: Union[str, List[Dict[str, str]], Dict[str, str]],
             if item.get("type") == "text":
                 parts.append(item["text"])
             elif item.get("type") == "image_url":
-                image_data = item.get("image_url", {}).get("url", "")
-                if image_data.startswith('data:image'):
-                    set_clipboard_image(image_data, debug=debug)
                 parts.append("[Image: An uploaded image]")
         return "\n".join(parts)
-    return ""
\ No newline at end of file
+    return ""
+
+def get_working_directory(messages: List[Dict]) -> Optional[str]:
+    """Returns the workspace path from the newest environment_details in a Cline conversation."""
+    for message in reversed(messages or []):
+        if not isinstance(message, dict):
+            continue
+        match = WORKING_DIRECTORY_RE.search(get_content_text(message.get('content', '')))
+        if match:
+            return match.group(1).strip()
+    return None
@@ -0,0 +1,173 @@
+import threading
+from collections import deque
+
+# Seconds; spans a quick handoff up to a long agent run
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+DEFAULT_WINDOW = 512
+QUANTILES = (0.5, 0.95, 0.99)
+MAX_LABEL_VALUES = 50
+
+# Task phases derived from the per-task timestamps, in the order they happen
+TASK_PHASES = (
+    ('queue_wait', 'enqueued', 'started'),
+    ('window_ready', 'started', 'window_ready'),
+    ('paste', 'window_ready', 'pasted'),
+    ('run', 'pasted', 'completed'),
+    ('total', 'enqueued', 'completed'),
+)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """
+    Fixed-bucket histogram plus a ring of the most recent samples for rolling quantiles.
+    Memory stays constant however many observations are made.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=DEFAULT_WINDOW):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+class MetricsRegistry:
+    """Counters and histograms keyed by name and label set, rendered as Prometheus text."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._label_values = {}
+
+    def _labels(self, labels):
+        # Cap distinct values per label so free-form values (project names) cannot grow without bound
+        items = []
+        for key, value in sorted(labels.items()):
+            seen = self._label_values.setdefault(key, set())
+            if value not in seen and len(seen) >= MAX_LABEL_VALUES:
+                value = 'other'
+            seen.add(value)
+            items.append((key, value))
+        return tuple(items)
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text)
+
+    def histogram(self, name, help_text):
+        self._meta[name] = ('histogram', help_text)
+
+    def gauge(self, name, help_text, fn):
+        """Registers a gauge whose value is read from `fn()` at render time."""
+        self._meta[name] = ('gauge', help_text)
+        self._gauges[name] = fn
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            key = (name, self._labels(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            key = (name, self._labels(labels))
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def summary(self):
+        """Counters and per-histogram count / mean / p50 / p95 / p99, for the control panel."""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = []
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                quantiles = histogram.quantiles()
+                histograms.append({
+                    'name': name, 'labels': dict(labels), 'count': histogram.count,
+                    'mean': round(histogram.sum / histogram.count, 3) if histogram.count else 0.0,
+                    'p50': round(quantiles[0.5], 3), 'p95': round(quantiles[0.95], 3), 'p99': round(quantiles[0.99], 3)
+                })
+        return {'counters': counters, 'histograms': histograms}
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        # Gauges read other components' state, so evaluate them before taking our own lock
+        gauges = {}
+        for name, fn in list(self._gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception:
+                pass
+        with self._lock:
+            for name, (kind, help_text) in sorted(self._meta.items()):
+                if kind == 'gauge' and name not in gauges:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == 'gauge':
+                    lines.append(f"{name} {_format_value(gauges[name])}")
+                elif kind == 'counter':
+                    for (series, labels), value in sorted(self._counters.items()):
+                        if series == name:
+                            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                else:
+                    recent = []
+                    for (series, labels), histogram in sorted(self._histograms.items()):
+                        if series != name:
+                            continue
+                        cumulative = 0
+                        for bound, count in zip(histogram.buckets, histogram.counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+                        for q, value in histogram.quantiles().items():
+                            recent.append(f"{name}_recent{_format_labels(labels + (('quantile', q),))} {_format_value(value)}")
+                    if recent:
+                        lines.append(f"# HELP {name}_recent Rolling quantiles over the last {DEFAULT_WINDOW} observations.")
+                        lines.append(f"# TYPE {name}_recent gauge")
+                        lines.extend(recent)
+        return '\n'.join(lines) + '\n'
+
+class TaskMetrics:
+    """Turns the timestamps stamped on queued tasks into phase histograms and outcome counters."""
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.registry.counter('clinex_tasks_total', "Queued tasks finished, by outcome and project.")
+        self.registry.histogram('clinex_task_phase_seconds', "Time spent in each phase of a queued task.")
+
+    def record(self, task, outcome):
+        timings = task.get('timings') or {}
+        self.registry.inc('clinex_tasks_total', outcome=outcome, project=task.get('project_name') or 'unknown')
+        for phase, start, end in TASK_PHASES:
+            if start in timings and end in timings:
+                self.registry.observe('clinex_task_phase_seconds', max(0.0, timings[end] - timings[start]), phase=phase)
@@ -0,0 +1,71 @@
+import time
+import heapq
+import itertools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PacingScheduler:
+    """
+    Per-key leaky-bucket pacing without sleeping in request threads.
+    Each key (model) hands out start slots at least its interval apart; work that is not yet
+    due is parked on a single timer thread and dispatched when its slot arrives.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_slot = {}
+        self._timers = []
+        self._seq = itertools.count()
+        self._thread = None
+        self.stats = {}
+
+    def _key_stats(self, key):
+        return self.stats.setdefault(key, {'admitted': 0, 'delayed': 0, 'total_delay': 0.0, 'max_delay': 0.0})
+
+    def reserve(self, key, interval):
+        """Reserves the next start slot for `key` and returns how many seconds away it is."""
+        with self._cond:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(key, 0.0))
+            self._next_slot[key] = start + max(0.0, interval)
+            delay = start - now
+            stats = self._key_stats(key)
+            stats['admitted'] += 1
+            if delay > 0:
+                stats['delayed'] += 1
+                stats['total_delay'] += delay
+                stats['max_delay'] = max(stats['max_delay'], delay)
+            return delay
+
+    def call_later(self, key, delay, fn):
+        """Runs `fn()` on the timer thread after `delay` seconds (immediately if not positive)."""
+        if delay <= 0:
+            fn()
+            return
+        with self._cond:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._seq), key, fn))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pacing-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._timers or self._timers[0][0] > time.monotonic():
+                    timeout = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._cond.wait(timeout)
+                _, _, _, fn = heapq.heappop(self._timers)
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Paced dispatch failed: {e}", exc_info=True)
+
+    def get_stats(self, key):
+        with self._cond:
+            stats = dict(self._key_stats(key))
+            stats['total_delay'] = round(stats['total_delay'], 3)
+            stats['max_delay'] = round(stats['max_delay'], 3)
+            stats['pending'] = sum(1 for timer in self._timers if timer[2] == key)
+            return stats
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PROBE_WORKERS = 8
+PROBE_DEADLINE = 0.5
+PROBE_CHUNK = 64
+
+def probe_root(path):
+    """
+    The mount a path most likely lives on: its drive or UNC share on Windows, the first two
+    components elsewhere (/mnt/nas, /Volumes/Backup). Paths on one root are probed together,
+    so a dead share only holds up its own paths.
+    """
+    drive, rest = os.path.splitdrive(os.path.normpath(path))
+    if drive:
+        return drive.lower()
+    parts = [part for part in rest.split(os.sep) if part]
+    return os.sep + os.sep.join(parts[:2])
+
+class _ProbeCall:
+    def __init__(self, count):
+        self.cond = threading.Condition()
+        self.results = {}
+        self.remaining = count
+        self.closed = False
+
+class PathProber:
+    """
+    Runs blocking filesystem probes (stat, listdir) on a bounded thread pool and waits at
+    most `deadline` seconds for them. Paths whose probe has not finished by then are
+    reported as unavailable; the probe keeps running in the background and, when it does
+    finish, its result goes to `on_late` and the path becomes available again. A path is
+    never probed twice at once, so a hung mount ties up one worker, not all of them.
+    """
+    def __init__(self, workers=PROBE_WORKERS, deadline=PROBE_DEADLINE, chunk_size=PROBE_CHUNK):
+        self.deadline = deadline
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="path-probe")
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._unavailable = {}
+        self.stats = {'probes': 0, 'timeouts': 0, 'recovered': 0, 'errors': 0}
+
+    def probe(self, kind, fn, paths, deadline=None, on_late=None):
+        """
+        Calls fn(path) for each path. Returns (results, missing): results maps each path that
+        finished within the deadline to fn's return value; missing lists the others, which
+        are now marked unavailable.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        groups = {}
+        missing = []
+        with self._lock:
+            for path in dict.fromkeys(paths):
+                if (kind, path) in self._in_flight:
+                    missing.append(path)
+                    continue
+                self._in_flight.add((kind, path))
+                groups.setdefault(probe_root(path), []).append(path)
+            self.stats['probes'] += sum(len(group) for group in groups.values())
+
+        call = _ProbeCall(sum(len(group) for group in groups.values()))
+        for group in groups.values():
+            for i in range(0, len(group), self.chunk_size):
+                self._executor.submit(self._work, kind, fn, group[i:i + self.chunk_size], call, on_late)
+
+        with call.cond:
+            call.cond.wait_for(lambda: call.remaining == 0, deadline)
+            call.closed = True
+            results = dict(call.results)
+
+        missing.extend(path for group in groups.values() for path in group if path not in results)
+        if missing:
+            now = time.monotonic()
+            with self._lock:
+                for path in missing:
+                    if path not in self._unavailable:
+                        logger.warning(f"{path} did not respond within {deadline:.1f}s; marking it unavailable.")
+                    self._unavailable.setdefault(path, now)
+                self.stats['timeouts'] += len(missing)
+        return results, missing
+
+    def _work(self, kind, fn, paths, call, on_late):
+        for path in paths:
+            try:
+                result = fn(path)
+            except Exception as e:
+                logger.debug(f"Probe of {path} failed: {e}")
+                result = None
+                with self._lock:
+                    self.stats['errors'] += 1
+            with self._lock:
+                self._in_flight.discard((kind, path))
+                recovered = self._unavailable.pop(path, None) is not None
+                if recovered:
+                    self.stats['recovered'] += 1
+            with call.cond:
+                late = call.closed
+                if not late:
+                    call.results[path] = result
+                    call.remaining -= 1
+                    call.cond.notify_all()
+            if late and on_late is not None:
+                on_late(path, result)
+
+    def unavailable(self):
+        """Paths whose last probe did not finish in time, with the monotonic time they were marked."""
+        with self._lock:
+            return dict(self._unavailable)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._in_flight), unavailable=len(self._unavailable))
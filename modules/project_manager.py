@@ -1,7 +1,7 @@
 import os
 import json
 import logging
-from modules.vscode_utils import load_ignored_folders, find_project_icon
+from modules.vscode_utils import ignore_registry, normalize_path, find_project_icons
 from modules.project_utils import get_ui_projects_data
 
 logger = logging.getLogger(__name__)
@@ -26,47 +26,46 @@ def save_project_links(links_data):
         logger.error(f"Error saving project links: {e}")
 
 def filter_ignored_projects(items):
-    ignored = load_ignored_folders()
+    ignored = ignore_registry.normalized()
     if not ignored:
         return items
-    ignored_norm = [os.path.normcase(os.path.normpath(p)) for p in ignored]
-    return [item for item in items if not item.get('path') or os.path.normcase(os.path.normpath(item['path'])) not in ignored_norm]
+    return [item for item in items if not item.get('path') or normalize_path(item['path']) not in ignored]
 
 def get_all_projects_with_ignore_state():
     projects = get_ui_projects_data()
-    ignored = load_ignored_folders()
+    ignored = ignore_registry.normalized()
     
     if not ignored:
         for p in projects:
             p['is_ignored'] = False
         return projects
         
-    ignored_norm = [os.path.normcase(os.path.normpath(p)) for p in ignored]
     project_paths_norm = set()
     
     for p in projects:
         p_path = p.get('path')
         if p_path:
-            norm_p = os.path.normcase(os.path.normpath(p_path))
-            p['is_ignored'] = norm_p in ignored_norm
+            norm_p = normalize_path(p_path)
+            p['is_ignored'] = norm_p in ignored
             project_paths_norm.add(norm_p)
         else:
             p['is_ignored'] = False
             
     # Add any ignored folders that are not currently in the projects list (because they were filtered out upstream)
-    for ig_path in ignored:
-        norm_ig = os.path.normcase(os.path.normpath(ig_path))
-        if norm_ig not in project_paths_norm:
-            icon_path = find_project_icon(ig_path)
-            projects.append({
-                'name': os.path.basename(ig_path) or ig_path,
-                'path': ig_path,
-                'has_icon': bool(icon_path and os.path.exists(icon_path)),
-                'is_ignored': True
-            })
-            project_paths_norm.add(norm_ig)
+    extra = [ig_path for ig_path in ignore_registry.paths() if normalize_path(ig_path) not in project_paths_norm]
+    icons, unavailable = find_project_icons(extra)
+    for ig_path in extra:
+        project = {
+            'name': os.path.basename(os.path.normpath(ig_path)) or ig_path,
+            'path': ig_path,
+            'has_icon': icons.get(ig_path) is not None,
+            'is_ignored': True
+        }
+        if ig_path in unavailable:
+            project['unavailable'] = True
+        projects.append(project)
             
     # Sort projects so that ignored ones appear at the beginning, preserving existing order otherwise.
     projects.sort(key=lambda x: not x.get('is_ignored', False))
             
-    return projects
\ No newline at end of file
+    return projects
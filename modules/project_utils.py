@@ -1,22 +1,38 @@
 import os
-from modules.vscode_utils import get_vscode_projects, load_ignored_folders, find_project_icon, get_active_windows
+from modules.vscode_utils import (get_vscode_projects, find_project_icons, get_active_windows, project_index,
+                                  ignore_registry, normalize_path)
+
+def get_visible_projects():
+    """
+    Returns the paths of known VS Code projects that are not ignored, without looking
+    for icons; this is the index queue submissions are validated against.
+    """
+    all_projects = get_vscode_projects()
+    ignored = ignore_registry.normalized()
+    if not ignored:
+        return all_projects
+    return [p for p in all_projects if normalize_path(p) not in ignored]
 
 def get_ui_projects_data():
     """
     Retrieves and formats project data for the dashboard and multi-project views.
-    Returns a list of dictionaries with 'path', 'name', and 'has_icon'.
+    Returns a list of dictionaries with 'path', 'name', and 'has_icon'; projects on a drive
+    or share that did not answer in time also get 'unavailable': True.
     """
-    all_projects = get_vscode_projects()
-    ignored_folders = load_ignored_folders()
-    visible_projects = [p for p in all_projects if p not in ignored_folders]
+    visible_projects = get_visible_projects()
+    icons, unavailable = find_project_icons(visible_projects)
+    unavailable |= project_index.unavailable()
     
     projects_data = []
     for p in visible_projects:
-        projects_data.append({
+        project = {
             'path': p,
             'name': os.path.basename(p),
-            'has_icon': find_project_icon(p) is not None
-        })
+            'has_icon': icons.get(p) is not None
+        }
+        if p in unavailable:
+            project['unavailable'] = True
+        projects_data.append(project)
     return projects_data
 
 def get_ui_active_windows():
@@ -24,30 +40,28 @@ def get_ui_active_windows():
     Retrieves active windows and matches them with VS Code projects to find icons.
     """
     active_windows = get_active_windows()
-    all_projects = get_vscode_projects()
     
     for win in active_windows:
         win['has_icon'] = False
-        win['path'] = "" 
-        matched_proj = next((p for p in all_projects if os.path.basename(p) == win['name']), None)
-        if matched_proj:
-            win['path'] = matched_proj
-            if find_project_icon(matched_proj):
-                win['has_icon'] = True
+        win['path'] = project_index.find_by_name(win['name']) or ""
+    icons, _ = find_project_icons([win['path'] for win in active_windows if win['path']])
+    for win in active_windows:
+        if win['path'] and icons.get(win['path']):
+            win['has_icon'] = True
     return active_windows
 
 def get_project_icon_info(project_name):
     """
     Finds a specific project's path and icon status by its basename.
     """
-    all_projects = get_vscode_projects()
     project_path = ""
     project_has_icon = False
     
-    matched_proj = next((p for p in all_projects if os.path.basename(p) == project_name), None)
+    matched_proj = project_index.find_by_name(project_name)
     if matched_proj:
         project_path = matched_proj
-        if find_project_icon(matched_proj):
+        icons, _ = find_project_icons([matched_proj])
+        if icons.get(matched_proj):
             project_has_icon = True
             
     return project_path, project_has_icon
\ No newline at end of file
@@ -0,0 +1,162 @@
+import re
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FILE_CONTENT_RE = re.compile(r'(<file_content path="([^"]*)">)(.*?)(</file_content>)', re.DOTALL)
+ENVIRONMENT_DETAILS_RE = re.compile(r'\s*<environment_details>.*?</environment_details>\s*', re.DOTALL)
+# Cline opens every tool result with "[<tool> for '<target>'] Result:", either in the same
+# text block as the output or as a block of its own followed by the output
+TOOL_RESULT_RE = re.compile(r'\s*\[[^\]\n]+\] Result:')
+
+# Only these keys matter to the browser model; everything else is client metadata
+MESSAGE_KEYS = ('role', 'content')
+PART_KEYS = ('type', 'text', 'image_url')
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'truncate_stale': False,
+    'keep_recent_messages': 6,
+    'stale_budget_chars': 4000,
+    'min_dedupe_chars': 512
+}
+
+_totals_lock = threading.Lock()
+compaction_totals = {'requests': 0, 'chars_before': 0, 'chars_after': 0}
+
+def get_compaction_settings(config):
+    """Reads the compaction settings from the configuration dictionary."""
+    return {
+        'enabled': str(config.get('prompt_compaction', DEFAULT_SETTINGS['enabled'])).lower() == 'true',
+        'truncate_stale': str(config.get('compaction_truncate_stale', DEFAULT_SETTINGS['truncate_stale'])).lower() == 'true',
+        'keep_recent_messages': int(config.get('compaction_keep_recent_messages', DEFAULT_SETTINGS['keep_recent_messages'])),
+        'stale_budget_chars': int(config.get('compaction_stale_budget_chars', DEFAULT_SETTINGS['stale_budget_chars'])),
+        'min_dedupe_chars': int(config.get('compaction_min_dedupe_chars', DEFAULT_SETTINGS['min_dedupe_chars']))
+    }
+
+def _content_size(content):
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(len(part.get('text', '')) for part in content if isinstance(part, dict) and isinstance(part.get('text'), str))
+    return 0
+
+def _messages_size(messages):
+    return sum(_content_size(m.get('content')) for m in messages if isinstance(m, dict))
+
+def _digest(text):
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+
+def _truncate(text, budget):
+    if len(text) <= budget:
+        return text
+    head = budget * 3 // 4
+    tail = budget - head
+    return f"{text[:head]}\n[... {len(text) - budget} characters of stale output truncated by Cline-X ...]\n{text[-tail:]}"
+
+class _Compactor:
+    def __init__(self, settings):
+        self.settings = settings
+        self.seen_parts = set()
+        self.seen_files = set()
+
+    def dedupe_files(self, text):
+        """Replaces <file_content> bodies already shown in a newer message with a marker."""
+        def replace(match):
+            body = match.group(3)
+            if len(body) < self.settings['min_dedupe_chars']:
+                return match.group(0)
+            key = (match.group(2), _digest(body))
+            if key in self.seen_files:
+                return f"{match.group(1)}[Unchanged: identical content for this file appears later in the conversation]{match.group(4)}"
+            self.seen_files.add(key)
+            return match.group(0)
+        return FILE_CONTENT_RE.sub(replace, text) if '<file_content' in text else text
+
+    def compact_text(self, text, is_latest, is_stale, is_tool_output):
+        if not is_latest and '<environment_details>' in text:
+            text = ENVIRONMENT_DETAILS_RE.sub('\n', text)
+        text = self.dedupe_files(text)
+        if not is_tool_output:
+            # The user's own words are never dropped or cut
+            return text
+        if len(text) >= self.settings['min_dedupe_chars']:
+            digest = _digest(text)
+            if digest in self.seen_parts:
+                return "[Duplicate tool output omitted: the same content appears later in the conversation]"
+            self.seen_parts.add(digest)
+        if is_stale and self.settings.get('truncate_stale'):
+            text = _truncate(text, self.settings['stale_budget_chars'])
+        return text
+
+    def compact_message(self, message, is_latest, is_stale):
+        compacted = {k: message[k] for k in MESSAGE_KEYS if k in message}
+        content = message.get('content')
+        # Only user turns carry tool results; assistant turns are kept verbatim
+        rewrite = message.get('role') == 'user'
+        if isinstance(content, str):
+            is_tool_output = bool(TOOL_RESULT_RE.match(content))
+            compacted['content'] = self.compact_text(content, is_latest, is_stale, is_tool_output) if rewrite else content
+        elif isinstance(content, list):
+            parts = []
+            after_header = False
+            for part in content:
+                if not isinstance(part, dict):
+                    parts.append(part)
+                    continue
+                part = {k: part[k] for k in PART_KEYS if k in part}
+                if rewrite and part.get('type') == 'text' and isinstance(part.get('text'), str):
+                    header = TOOL_RESULT_RE.match(part['text'])
+                    is_tool_output = after_header or header is not None
+                    # A block holding only the header announces the output in the next block
+                    after_header = header is not None and not part['text'][header.end():].strip()
+                    part['text'] = self.compact_text(part['text'], is_latest, is_stale, is_tool_output)
+                    if not part['text'].strip():
+                        continue
+                parts.append(part)
+            compacted['content'] = parts
+        return compacted
+
+def compact_request(request_json, settings):
+    """
+    Returns a compacted copy of a Cline request (the original is not modified) and a
+    stats dict with before/after sizes. Walks the conversation newest-first so the most
+    recent copy of any repeated file or tool output is the one that is kept.
+
+    Lossless steps (dropping stale environment details, deduplicating files and tool
+    output) run whenever compaction is enabled. Truncating tool output older than
+    `keep_recent_messages` loses information and only runs with 'truncate_stale' set.
+    The first user message, which holds the task, is always passed on verbatim.
+    """
+    messages = request_json.get('messages') if isinstance(request_json, dict) else None
+    if not settings.get('enabled') or not isinstance(messages, list):
+        size = _messages_size(messages or [])
+        return request_json, {'chars_before': size, 'chars_after': size}
+
+    compactor = _Compactor(settings)
+    keep_recent = max(1, settings['keep_recent_messages'])
+    total = len(messages)
+    task_index = next((i for i, m in enumerate(messages) if isinstance(m, dict) and m.get('role') == 'user'), None)
+    compacted = [None] * total
+    for index in range(total - 1, -1, -1):
+        message = messages[index]
+        if not isinstance(message, dict):
+            compacted[index] = message
+            continue
+        if message.get('role') == 'system' or index == task_index:
+            compacted[index] = {k: message[k] for k in MESSAGE_KEYS if k in message}
+            continue
+        compacted[index] = compactor.compact_message(message, is_latest=(index == total - 1), is_stale=(index < total - keep_recent))
+
+    stats = {'chars_before': _messages_size(messages), 'chars_after': _messages_size(compacted)}
+    with _totals_lock:
+        compaction_totals['requests'] += 1
+        compaction_totals['chars_before'] += stats['chars_before']
+        compaction_totals['chars_after'] += stats['chars_after']
+    return {'messages': compacted}, stats
+
+def get_compaction_totals():
+    with _totals_lock:
+        return dict(compaction_totals)
@@ -0,0 +1,142 @@
+import json
+import os
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from modules.config_utils import APP_PATH, get_rules_content
+
+RULES_PATH = os.path.join(APP_PATH, "unified_rules.txt")
+
+SUMMARY_INSTRUCTION = r"You MUST include a `<summary>` tag inside your `<thinking>` block for every tool call. This summary should be a very brief, user-friendly explanation of the action you are about to take. For example: `<summary>Reading the project's configuration to check dependencies.</summary>`."
+
+_rules_lock = threading.Lock()
+_rules_cache = {'key': None, 'content': None, 'skeletons': {}}
+
+def _rules_file_key():
+    """Returns an (mtime, size) signature for the rules file, or None if it is missing."""
+    try:
+        st = os.stat(RULES_PATH)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def get_cached_rules():
+    """
+    Returns the unified rules, only re-reading the file when its mtime or size changes.
+    Returns a (content, version_key) tuple.
+    """
+    key = _rules_file_key()
+    cached = _rules_cache
+    if cached['content'] is not None and cached['key'] == key:
+        return cached['content'], key
+
+    with _rules_lock:
+        if _rules_cache['content'] is None or _rules_cache['key'] != key:
+            content = get_rules_content()
+            # Re-stat after reading so a write racing with the read invalidates on the next call
+            _rules_cache.update({'key': _rules_file_key() if key else None, 'content': content, 'skeletons': {}})
+        return _rules_cache['content'], _rules_cache['key']
+
+def summary_required(terminal_alert_level, ntfy_notification_level):
+    """Whether the model must be asked for per-tool-call summaries at these alert/notification levels."""
+    return terminal_alert_level == 'all' or ntfy_notification_level == 'all'
+
+def get_prompt_skeleton(terminal_alert_level, ntfy_notification_level):
+    """
+    Returns the precompiled static parts of the prompt for the given alert/notification levels
+    as a (header, footer) tuple. The request log goes before `header` and the user prompt
+    between `header` and `footer`.
+    """
+    rules, rules_key = get_cached_rules()
+    include_summary = summary_required(terminal_alert_level, ntfy_notification_level)
+    cache_key = (rules_key, include_summary)
+    skeleton = _rules_cache['skeletons'].get(cache_key)
+    if skeleton is None:
+        header = f"\n{SUMMARY_INSTRUCTION}\n" if include_summary else "\n"
+        footer = f"\n{rules}"
+        skeleton = (header, footer)
+        _rules_cache['skeletons'][cache_key] = skeleton
+    return skeleton
+
+IMAGE_PLACEHOLDER = "[Image: An uploaded image]"
+
+# text: the full prompt; images: inline image data URIs; prefix_len: length of the timestamped log prefix
+PromptBuild = namedtuple('PromptBuild', ['text', 'images', 'prefix_len'])
+
+_encode_str = json.encoder.encode_basestring_ascii
+
+def _write_json(value, write, images):
+    """
+    Serializes `value` exactly like json.dumps(), except that inline `image_url` data URIs
+    are written as a placeholder and collected into `images` instead of being copied.
+    """
+    if isinstance(value, str):
+        write(_encode_str(value))
+    elif isinstance(value, dict):
+        if value.get('type') == 'image_url' and isinstance(value.get('image_url'), dict):
+            url = value['image_url'].get('url', '')
+            if isinstance(url, str) and url.startswith('data:'):
+                if url.startswith('data:image'):
+                    images.append(url)
+                value = dict(value, image_url=dict(value['image_url'], url=IMAGE_PLACEHOLDER))
+        write('{')
+        first = True
+        for k, v in value.items():
+            if not first:
+                write(', ')
+            first = False
+            write(_encode_str(k if isinstance(k, str) else json.dumps(k)))
+            write(': ')
+            _write_json(v, write, images)
+        write('}')
+    elif isinstance(value, (list, tuple)):
+        write('[')
+        first = True
+        for v in value:
+            if not first:
+                write(', ')
+            first = False
+            _write_json(v, write, images)
+        write(']')
+    else:
+        write(json.dumps(value))
+
+def build_prompt(request_json, prompt, terminal_alert_level, ntfy_notification_level):
+    """
+    Builds the full prompt for the model in a single pass over the request.
+    Image payloads of any MIME type are replaced by a placeholder while walking, so they are
+    never serialized into the prompt. Returns a PromptBuild.
+    """
+    parts = []
+    write = parts.append
+    images = []
+    prompt_header, prompt_footer = get_prompt_skeleton(terminal_alert_level, ntfy_notification_level)
+
+    prefix = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - INFO - Request data: "
+    write(prefix)
+    _write_json(request_json, write, images)
+    write(prompt_header)
+    write(prompt)
+    write(prompt_footer)
+    return PromptBuild("".join(parts), images, len(prefix))
+
+def image_digest(data_uri):
+    """Content hash of an inline image, shared by request fingerprints and the image cache."""
+    return hashlib.sha256(data_uri.encode('ascii', 'replace')).hexdigest()
+
+def prompt_fingerprint(build, model, image_digests=None):
+    """
+    Returns a stable hash of a built prompt for `model`: the prompt text minus its timestamp,
+    plus a digest of every image, so identical conversations map to the same key.
+    """
+    if image_digests is None:
+        image_digests = [image_digest(image) for image in build.images]
+    h = hashlib.sha256()
+    h.update(model.encode('utf-8'))
+    h.update(b'\0')
+    h.update(build.text[build.prefix_len:].encode('utf-8', 'surrogatepass'))
+    for digest in image_digests:
+        h.update(b'\0')
+        h.update(digest.encode('ascii'))
+    return h.hexdigest()
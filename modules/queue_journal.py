@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 0.05
+WRITE_RETRY_SECONDS = 1.0
+COMPACT_MIN_RECORDS = 1000
+
+class QueueJournal:
+    """
+    Append-only, JSON-lines journal of task-queue events (enqueue / start / done).
+    Callers only append to an in-memory buffer; a background writer thread writes the
+    buffer out and fsyncs once per batch, so enqueueing never waits on the disk.
+    Replaying the journal on startup yields the tasks that were pending or in flight.
+    """
+    def __init__(self, path, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._appended = 0
+        self._written = 0
+        self._records = 0
+        self._live = OrderedDict()
+        self._started = set()
+        self._thread = None
+        self.stats = {'records': 0, 'batches': 0, 'compactions': 0, 'write_errors': 0, 'skipped_lines': 0}
+
+    def recover(self):
+        """
+        Replays the journal. Returns (pending, in_flight) task lists in queue order and
+        rewrites the journal so it only holds those tasks. Raises OSError if the journal
+        exists but cannot be read.
+        """
+        tasks = OrderedDict()
+        started = set()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        op = record.get('op')
+                        if op == 'enqueue':
+                            task = record['task']
+                            tasks[task['id']] = task
+                        elif op == 'start':
+                            started.add(record['id'])
+                        elif op == 'done':
+                            tasks.pop(record['id'], None)
+                            started.discard(record['id'])
+                    except (ValueError, TypeError, KeyError, AttributeError):
+                        # A torn final line from a crash mid-write, or a record of the wrong shape
+                        self.stats['skipped_lines'] += 1
+                        continue
+        in_flight = [task for task_id, task in tasks.items() if task_id in started]
+        pending = [task for task_id, task in tasks.items() if task_id not in started]
+        with self._cond:
+            self._live = OrderedDict((task['id'], task) for task in in_flight + pending)
+            self._started = set(task['id'] for task in in_flight)
+        try:
+            self._rewrite(in_flight + pending, self._started)
+        except OSError as e:
+            # The old journal still replays to the same tasks, so keep appending to it
+            logger.error(f"Failed to compact queue journal {self.path}: {e}")
+        return pending, in_flight
+
+    def _append(self, *records):
+        with self._cond:
+            self._buffer.extend(json.dumps(record) + '\n' for record in records)
+            self._appended += len(records)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="queue-journal", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def record_enqueue(self, task):
+        with self._cond:
+            self._live[task['id']] = task
+        self._append({'op': 'enqueue', 'task': task})
+
+    def record_enqueue_many(self, tasks):
+        """Records several enqueues with one buffer append, so they reach the disk in the same batch."""
+        with self._cond:
+            for task in tasks:
+                self._live[task['id']] = task
+        self._append(*({'op': 'enqueue', 'task': task} for task in tasks))
+
+    def record_start(self, task_id):
+        with self._cond:
+            self._started.add(task_id)
+        self._append({'op': 'start', 'id': task_id})
+
+    def record_done(self, task_id):
+        with self._cond:
+            self._live.pop(task_id, None)
+            self._started.discard(task_id)
+        self._append({'op': 'done', 'id': task_id})
+
+    def _rewrite(self, tasks, started):
+        """
+        Atomically replaces the journal with the live tasks and their start marks. Only called
+        from recover() or the writer thread, so no append can land between snapshot and replace.
+        """
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for task in tasks:
+                f.write(json.dumps({'op': 'enqueue', 'task': task}) + '\n')
+                if task['id'] in started:
+                    f.write(json.dumps({'op': 'start', 'id': task['id']}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        with self._cond:
+            self._records = len(tasks)
+            self.stats['compactions'] += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait()
+                batch, self._buffer = self._buffer, []
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.writelines(batch)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                # Keep the batch and try again; replaying a record twice is harmless, so a
+                # partly written batch can simply be written again
+                logger.error(f"Failed to write queue journal: {e}")
+                with self._cond:
+                    self._buffer[:0] = batch
+                    self.stats['write_errors'] += 1
+                time.sleep(WRITE_RETRY_SECONDS)
+                continue
+            with self._cond:
+                self._written += len(batch)
+                self._records += len(batch)
+                self.stats['records'] += len(batch)
+                self.stats['batches'] += 1
+                compact = self._records >= COMPACT_MIN_RECORDS and self._records > 4 * len(self._live)
+                if compact:
+                    live, started = list(self._live.values()), set(self._started)
+                self._cond.notify_all()
+            if compact:
+                try:
+                    self._rewrite(live, started)
+                except OSError as e:
+                    logger.error(f"Failed to compact queue journal: {e}")
+            # Let more records pile up so the next fsync covers a whole batch
+            time.sleep(self.flush_interval)
+
+    def flush(self, timeout=5.0):
+        """
+        Blocks until everything appended so far is on disk (e.g. before the process exits).
+        Returns False if that did not happen within `timeout`, e.g. because writes are failing.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            target = self._appended
+            while self._written < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def get_stats(self):
+        with self._cond:
+            return dict(self.stats, buffered=len(self._buffer), live_tasks=len(self._live), path=self.path)
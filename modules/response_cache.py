@@ -0,0 +1,85 @@
+import time
+import threading
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    LRU cache of finished model responses keyed by request fingerprint.
+    Entries expire after `ttl_seconds`, and the least recently used entries are evicted
+    once either `max_entries` or `max_bytes` is exceeded.
+    """
+    def __init__(self, enabled=False, ttl_seconds=600, max_entries=64, max_bytes=16 * 1024 * 1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expired': 0}
+        self.configure(enabled, ttl_seconds, max_entries, max_bytes)
+
+    def configure(self, enabled, ttl_seconds, max_entries, max_bytes):
+        with self._lock:
+            self.enabled = bool(enabled)
+            self.ttl_seconds = max(0, float(ttl_seconds))
+            self.max_entries = max(1, int(max_entries))
+            self.max_bytes = max(0, int(max_bytes))
+            if not self.enabled:
+                self._entries.clear()
+                self._bytes = 0
+            self._evict()
+
+    @staticmethod
+    def _size(text):
+        # Python strings use up to 4 bytes per character; len() is a cheap, stable approximation
+        return len(text)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, text) = self._entries.popitem(last=False)
+            self._bytes -= self._size(text)
+            self.stats['evictions'] += 1
+
+    def get(self, key):
+        """Returns the cached response for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self._bytes -= self._size(entry[1])
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, key, text):
+        if not self.enabled or not text or self._size(text) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(old[1])
+            self._entries[key] = (time.monotonic(), text)
+            self._bytes += self._size(text)
+            self.stats['stores'] += 1
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats,
+                        enabled=self.enabled,
+                        entries=len(self._entries),
+                        bytes=self._bytes,
+                        ttl_seconds=self.ttl_seconds,
+                        max_entries=self.max_entries,
+                        max_bytes=self.max_bytes,
+                        hit_rate=round(self.stats['hits'] / lookups, 3) if lookups else 0.0)
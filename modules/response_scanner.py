@@ -0,0 +1,212 @@
+import re
+import threading
+from collections import Counter
+
+# Tool tags Cline understands; anything else that looks like a tag is treated as text
+TOOL_TAGS = frozenset([
+    'write_to_file', 'replace_in_file', 'execute_command', 'read_file', 'search_files', 'list_files',
+    'list_code_definition_names', 'browser_action', 'use_mcp_tool', 'access_mcp_resource',
+    'ask_followup_question', 'attempt_completion', 'plan_mode_respond', 'new_task'
+])
+# Tools the headless protocol in unified_rules.txt forbids
+DISABLED_TOOLS = frozenset(['replace_in_file', 'search_files'])
+BLOCK_TAGS = frozenset(['thinking', 'summary', 'result', 'path', 'content', 'command', 'response'])
+KNOWN_TAGS = TOOL_TAGS | BLOCK_TAGS
+
+TOKEN_RE = re.compile(r'```|<(/?)([a-z_]+)>')
+LANGUAGE_ID_RE = re.compile(r'^(python|py|typescript|ts|tsx|javascript|js|jsx|json|html|css|bash|sh|powershell|markdown|md|yaml|sql)$', re.IGNORECASE)
+MAX_TAG_LEN = max(len(t) for t in KNOWN_TAGS) + 3
+CONTENT_CLOSE = '</content>'
+
+VIOLATION_MESSAGES = {
+    'text_before_container': "Response must start with ``` (text found before the code block).",
+    'text_after_container': "Response must end with ``` (text found after the code block).",
+    'missing_container': "Response is not wrapped in a single ``` code block.",
+    'multiple_containers': "Response is split across several ``` code blocks.",
+    'unclosed_container': "The ``` code block is never closed.",
+    'fence_in_content': "write_to_file content contains a markdown code fence.",
+    'language_identifier': "write_to_file content starts with a language identifier.",
+    'escaped_quotes': "write_to_file content contains backslash-escaped double quotes.",
+    'disabled_tool': "A disabled tool (replace_in_file / search_files) was used.",
+    'missing_thinking': "No <thinking> block was included.",
+}
+
+_totals_lock = threading.Lock()
+violation_totals = Counter()
+
+class ResponseScanner:
+    """
+    One-pass, incremental scanner for model responses. Feed it the full text or streamed
+    chunks; it extracts summaries, thinking, completion and tool calls and records
+    violations of the headless output protocol as it goes.
+    """
+    def __init__(self):
+        self.summaries = []
+        self.thinking = []
+        self.tool_calls = []
+        self.has_completion = False
+        self.completion_result = None
+        self.violations = []
+        self.closed = False
+        self._buf = ""
+        self._open = Counter()
+        self._fences = 0
+        self._tool = None
+        self._capture = None
+        self._thinking_parts = []
+        self._in_content = False
+        self._content_head = ""
+        self._content_last = ""
+
+    @property
+    def summary(self):
+        """The first summary, matching the behaviour of the old regex search."""
+        return self.summaries[0] if self.summaries else None
+
+    def _violation(self, code):
+        if code not in self.violations:
+            self.violations.append(code)
+
+    def _text(self, text):
+        if not text:
+            return
+        if self._in_content:
+            self._content_text(text)
+            return
+        if self._fences != 1 and text.strip():
+            self._violation('text_before_container' if self._fences == 0 else 'text_after_container')
+        if self._capture is not None:
+            self._capture.append(text)
+        if self._open['thinking']:
+            self._thinking_parts.append(text)
+
+    def _content_text(self, text):
+        if not text:
+            return
+        self._tool['content_length'] += len(text)
+        if len(self._content_head) < 80:
+            self._content_head += text[:80]
+            first_line = self._content_head.lstrip('\r\n').split('\n', 1)
+            if len(first_line) > 1 and LANGUAGE_ID_RE.match(first_line[0].strip()):
+                self._violation('language_identifier')
+        # Also check the seam with the previous segment, so a fence or \" split between chunks is seen
+        seam = self._content_last + text[:2]
+        if '```' in text or '```' in seam:
+            self._violation('fence_in_content')
+        if '\\"' in text or '\\"' in seam:
+            self._violation('escaped_quotes')
+        self._content_last = (self._content_last + text)[-2:] if len(text) < 2 else text[-2:]
+
+    def _open_tag(self, name):
+        self._open[name] += 1
+        if name in TOOL_TAGS:
+            self._tool = {'tool': name, 'content_length': 0}
+            self.tool_calls.append(self._tool)
+            if name in DISABLED_TOOLS:
+                self._violation('disabled_tool')
+            if name == 'attempt_completion':
+                self.has_completion = True
+        elif name == 'thinking':
+            self._thinking_parts = []
+        elif name == 'summary':
+            self._capture = []
+        elif name in ('result', 'path', 'command') and self._tool is not None:
+            self._capture = []
+        elif name == 'content' and self._tool is not None and self._tool['tool'] == 'write_to_file':
+            self._in_content = True
+            self._content_head = ""
+            self._content_last = ""
+
+    def _close_tag(self, name):
+        if not self._open[name]:
+            return
+        self._open[name] -= 1
+        if name == 'thinking':
+            self.thinking.append("".join(self._thinking_parts).strip())
+        elif name == 'summary' and self._capture is not None:
+            self.summaries.append("".join(self._capture).strip())
+            self._capture = None
+        elif name in ('result', 'path', 'command') and self._capture is not None:
+            value = "".join(self._capture).strip()
+            self._capture = None
+            if name == 'result' and self._tool is not None and self._tool['tool'] == 'attempt_completion':
+                self.completion_result = value
+            elif self._tool is not None:
+                self._tool[name] = value
+        elif name in TOOL_TAGS:
+            self._tool = None
+
+    def _token(self, match):
+        if match.group(0) == '```':
+            self._fences += 1
+            if self._fences == 3:
+                self._violation('multiple_containers')
+            return
+        name = match.group(2)
+        if name not in KNOWN_TAGS:
+            self._text(match.group(0))
+        elif match.group(1):
+            self._close_tag(name)
+        else:
+            self._open_tag(name)
+
+    def feed(self, chunk):
+        buf = self._buf + chunk
+        pos = 0
+        while True:
+            if self._in_content:
+                # File bodies are opaque: jump straight to the closing tag instead of tokenizing them
+                end = buf.find(CONTENT_CLOSE, pos)
+                if end == -1:
+                    break
+                self._content_text(buf[pos:end])
+                self._in_content = False
+                self._open['content'] -= 1
+                pos = end + len(CONTENT_CLOSE)
+                continue
+            match = TOKEN_RE.search(buf, pos)
+            if match is None:
+                break
+            self._text(buf[pos:match.start()])
+            self._token(match)
+            pos = match.end()
+        # Hold back a possible partial token (`<summ`, or one or two backticks) for the next chunk
+        hold = len(buf)
+        lt = buf.rfind('<', pos)
+        if lt != -1 and '>' not in buf[lt:] and len(buf) - lt <= MAX_TAG_LEN:
+            hold = lt
+        else:
+            while hold > pos and len(buf) - hold < 2 and buf[hold - 1] == '`':
+                hold -= 1
+        self._text(buf[pos:hold])
+        self._buf = buf[hold:]
+
+    def close(self):
+        """Flushes any held-back text and finishes protocol validation."""
+        if self.closed:
+            return self
+        self.closed = True
+        self._text(self._buf)
+        self._buf = ""
+        if self._fences == 0:
+            self._violation('missing_container')
+        elif self._fences == 1:
+            self._violation('unclosed_container')
+        if not self.thinking and not self._open['thinking']:
+            self._violation('missing_thinking')
+        with _totals_lock:
+            violation_totals.update(self.violations)
+        return self
+
+    def describe_violations(self):
+        return [VIOLATION_MESSAGES[code] for code in self.violations]
+
+def scan_response(text):
+    """Scans a complete response string in one pass and returns the closed scanner."""
+    scanner = ResponseScanner()
+    scanner.feed(text)
+    return scanner.close()
+
+def get_violation_totals():
+    with _totals_lock:
+        return dict(violation_totals)
@@ -0,0 +1,60 @@
+import threading
+
+class _Call:
+    """A leader's run, published to followers once the leader has started it."""
+    def __init__(self):
+        self.ready = threading.Event()
+        self.response_stream = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight requests. The first caller for a key (the leader) starts
+    the work; callers arriving with the same key before it finishes (followers) attach to
+    the leader's ResponseStream instead of starting another automation run.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {'leaders': 0, 'followers': 0}
+
+    def run(self, key, start):
+        """
+        Returns (response_stream, is_leader). `start()` must return a ResponseStream and is
+        only called for the leader; the key is released as soon as that stream closes, after
+        any done-callbacks `start()` registered on it (e.g. storing the response in a cache).
+        """
+        with self._lock:
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._inflight[key] = _Call()
+                self.stats['leaders'] += 1
+            else:
+                self.stats['followers'] += 1
+
+        if not is_leader:
+            call.ready.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response_stream, False
+
+        try:
+            call.response_stream = start()
+        except Exception as e:
+            call.error = e
+            self._release(key, call)
+            raise
+        finally:
+            call.ready.set()
+        call.response_stream.add_done_callback(lambda _: self._release(key, call))
+        return call.response_stream, True
+
+    def _release(self, key, call):
+        with self._lock:
+            if self._inflight.get(key) is call:
+                del self._inflight[key]
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._inflight), automation_runs_saved=self.stats['followers'])
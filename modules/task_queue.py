@@ -0,0 +1,543 @@
+import os
+import math
+import time
+import logging
+import itertools
+import threading
+from collections import deque, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AFFINITY_WINDOW = 3
+
+def parse_schedule(data):
+    """
+    Reads a submission's optional 'priority' and 'deadline_minutes' and returns
+    (priority, deadline_seconds or None). Raises ValueError if either is not a usable number.
+    """
+    try:
+        priority = int(data.get('priority') or 0)
+    except (TypeError, ValueError):
+        raise ValueError("'priority' must be an integer")
+    deadline_seconds = None
+    if data.get('deadline_minutes') not in (None, ''):
+        try:
+            minutes = float(data['deadline_minutes'])
+        except (TypeError, ValueError):
+            raise ValueError("'deadline_minutes' must be a number")
+        if not math.isfinite(minutes) or minutes <= 0:
+            raise ValueError("'deadline_minutes' must be a positive number")
+        deadline_seconds = max(1, int(minutes * 60))
+    return priority, deadline_seconds
+
+def parse_affinity_window(data):
+    """
+    Reads a policy update's optional 'affinity_window' and returns it as an integer >= 1.
+    Raises ValueError if it is not a positive integer.
+    """
+    try:
+        window = int(data.get('affinity_window', DEFAULT_AFFINITY_WINDOW))
+    except (TypeError, ValueError):
+        raise ValueError("'affinity_window' must be an integer")
+    if window < 1:
+        raise ValueError("'affinity_window' must be at least 1")
+    return window
+
+def project_key(task):
+    path = task.get('project_path') or ''
+    return os.path.normcase(os.path.normpath(path)) if path else ''
+
+class ProjectQueue:
+    """
+    Queue policy: highest priority first; within a priority, projects take turns
+    (round-robin), but a project may keep its window for up to `affinity_window`
+    consecutive tasks so same-project work is batched without starving the others.
+    Affinity is tracked per lane, and a lane never takes a project another lane is running.
+    """
+    def __init__(self, affinity_window=DEFAULT_AFFINITY_WINDOW):
+        self.affinity_window = max(1, int(affinity_window))
+        self._levels = {}
+        self._seq = itertools.count()
+        self._size = 0
+        self.stats = {'window_switches': 0, 'switches_avoided': 0}
+
+    def __len__(self):
+        return self._size
+
+    def push(self, task, enqueued_at, front=False):
+        """Adds a task; `front` puts it (and its project) at the head of its priority level."""
+        projects = self._levels.setdefault(int(task.get('priority') or 0), OrderedDict())
+        key = project_key(task)
+        entries = projects.setdefault(key, deque())
+        if front:
+            entries.appendleft((-next(self._seq), task, enqueued_at))
+            projects.move_to_end(key, last=False)
+        else:
+            entries.append((next(self._seq), task, enqueued_at))
+        self._size += 1
+
+    def _fifo_project(self, exclude):
+        """The project strict FIFO order would have run next, for the stats."""
+        oldest = None
+        for projects in self._levels.values():
+            for key, entries in projects.items():
+                if key not in exclude and (oldest is None or entries[0][0] < oldest[0]):
+                    oldest = (entries[0][0], key)
+        return oldest[1] if oldest else None
+
+    def pop(self, lane, exclude=frozenset()):
+        """
+        Removes and returns (task, enqueued_at) for the task `lane` should run next, skipping
+        projects in `exclude`; returns None if nothing is eligible.
+        """
+        for level in sorted(self._levels, reverse=True):
+            projects = self._levels[level]
+            candidates = [key for key in projects if key not in exclude]
+            if not candidates:
+                continue
+            fifo_project = self._fifo_project(exclude)
+            if lane.last_project in candidates and lane.streak < self.affinity_window:
+                key = lane.last_project
+            else:
+                key = candidates[0]
+                if key == lane.last_project and len(candidates) > 1:
+                    # Window used up: send this project to the back and give the next one its turn
+                    projects.move_to_end(key)
+                    key = candidates[1]
+                projects.move_to_end(key)
+
+            entries = projects[key]
+            _, task, enqueued_at = entries.popleft()
+            if not entries:
+                del projects[key]
+                if not projects:
+                    del self._levels[level]
+            self._size -= 1
+
+            if key == lane.last_project:
+                lane.streak += 1
+                if fifo_project != key:
+                    self.stats['switches_avoided'] += 1
+            else:
+                if lane.last_project is not None:
+                    self.stats['window_switches'] += 1
+                lane.last_project = key
+                lane.streak = 1
+            return task, enqueued_at
+        return None
+
+    def remove(self, task_id):
+        """Removes a queued task by id; returns it, or None if it is not queued."""
+        for level, projects in self._levels.items():
+            for key, entries in projects.items():
+                for entry in entries:
+                    if entry[1]['id'] == task_id:
+                        entries.remove(entry)
+                        if not entries:
+                            del projects[key]
+                            if not projects:
+                                del self._levels[level]
+                        self._size -= 1
+                        return entry[1]
+        return None
+
+    def tasks(self):
+        """Queued tasks, highest priority first, then in arrival order."""
+        entries = [(-level, entry[0], entry[1]) for level, projects in self._levels.items()
+                   for queue in projects.values() for entry in queue]
+        return [task for _, _, task in sorted(entries, key=lambda e: (e[0], e[1]))]
+
+class Lane:
+    """One execution lane: runs one task at a time in its own VS Code window."""
+    def __init__(self, index):
+        now = time.monotonic()
+        self.index = index
+        self.current = None
+        self.busy = False
+        self.last_activity = now
+        self.idle_since = now
+        self.deadline = None
+        self.verdict = None
+        self.last_project = None
+        self.streak = 0
+        self.thread = None
+
+class TaskScheduler:
+    """
+    Long-lived scheduler for queued tasks. Tasks wait in a ProjectQueue; each of `lanes`
+    worker threads sleeps on a shared condition variable and dispatches its next task the
+    moment its lane goes idle (a completion arrives) instead of polling `system_busy`.
+    Lanes run different projects side by side; only the input-device critical sections
+    (focus, paste and enter in the runner, and a browser backend's whole round trip)
+    are serialized.
+
+    `runner(task)` is called on the lane's thread and should start the task (open the
+    project, send the message). The task then counts as in flight until `mark_idle()` is
+    called for its project. While it runs, the lane's thread doubles as a watchdog:
+
+    - `mark_busy()` is the task's heartbeat; no heartbeat for `timeout_seconds` means the
+      task is stuck and it is given up on straight away.
+    - A task past its deadline (`deadline_seconds`, or the task's own 'deadline_seconds'),
+      or one cancelled with `cancel()`, is given up on once it has been quiet for
+      `quiet_seconds`, so the next task never starts while the window is still in use.
+    - A task given up on is requeued at the front until it has had `max_attempts` runs,
+      then fails. Cancelled tasks are never requeued.
+
+    `mark_busy()` / `mark_idle()` take the project path the activity came from to find the
+    lane. With a single lane, activity that matches no task (a manual chat) still holds
+    the queue back, as it always has; with several lanes it is only counted.
+
+    With a `journal` (QueueJournal) every enqueue, start and finish is recorded so the
+    queue can be rebuilt with `recover()` after a restart or crash. With `events` (an
+    EventLog) the same transitions are published as enqueue / start / complete / fail /
+    cancel / requeue / busy events, each carrying its lane and the overall busy flag.
+
+    Each task gets a `timings` dict of wall-clock stamps (enqueued, started, window_ready,
+    pasted, completed); with `metrics` (a TaskMetrics) they are aggregated when it finishes.
+    """
+    def __init__(self, runner, timeout_seconds=300, journal=None, affinity_window=DEFAULT_AFFINITY_WINDOW,
+                 events=None, metrics=None, deadline_seconds=3600, max_attempts=2, quiet_seconds=30, lanes=1):
+        self.runner = runner
+        self.timeout_seconds = timeout_seconds
+        self.deadline_seconds = deadline_seconds
+        self.max_attempts = max(1, int(max_attempts))
+        self.quiet_seconds = quiet_seconds
+        self.journal = journal
+        self.events = events
+        self.metrics = metrics
+        self.lanes = [Lane(i) for i in range(max(1, int(lanes)))]
+        self._queue = ProjectQueue(affinity_window)
+        self._cond = threading.Condition()
+        self._started = False
+        self.stats = {'enqueued': 0, 'dispatched': 0, 'failed': 0, 'timeouts': 0, 'cancelled': 0, 'requeued': 0,
+                      'stalled': 0, 'deadline_exceeded': 0, 'heartbeats': 0, 'unattributed_activity': 0,
+                      'handoff_total': 0.0, 'handoff_max': 0.0, 'handoff_last': 0.0}
+
+    @property
+    def busy(self):
+        return any(lane.busy for lane in self.lanes)
+
+    @property
+    def current(self):
+        """The first running task (the only one with a single lane)."""
+        return next((lane.current for lane in self.lanes if lane.current is not None), None)
+
+    def _lane_states(self):
+        return [{'lane': lane.index, 'busy': lane.busy, 'task': lane.current} for lane in self.lanes]
+
+    def _start_worker(self):
+        if self._started:
+            return
+        self._started = True
+        for lane in self.lanes:
+            lane.thread = threading.Thread(target=self._run, args=(lane,), name=f"task-lane-{lane.index}", daemon=True)
+            lane.thread.start()
+
+    def _publish(self, kind, lane=None, **data):
+        if self.events is not None:
+            if lane is not None:
+                data['lane'] = lane.index
+            self.events.publish(kind, busy=self.busy, **data)
+
+    def _lane_for(self, project_path):
+        """The lane whose running task belongs to `project_path`; with one lane, always that lane."""
+        if project_path:
+            key = project_key({'project_path': project_path})
+            for lane in self.lanes:
+                if lane.current is not None and project_key(lane.current) == key:
+                    return lane
+        if len(self.lanes) == 1:
+            return self.lanes[0]
+        if not project_path:
+            running = [lane for lane in self.lanes if lane.current is not None]
+            if len(running) == 1:
+                return running[0]
+        return None
+
+    def enqueue(self, task):
+        with self._cond:
+            task.setdefault('timings', {})['enqueued'] = time.time()
+            if self.journal is not None:
+                self.journal.record_enqueue(task)
+            self._queue.push(task, time.monotonic())
+            self.stats['enqueued'] += 1
+            self._publish('enqueue', task=task)
+            self._start_worker()
+            self._cond.notify_all()
+        return task
+
+    def enqueue_many(self, tasks):
+        """Enqueues several tasks atomically: no task is dispatched until all of them are queued."""
+        if not tasks:
+            return tasks
+        now = time.time()
+        with self._cond:
+            for task in tasks:
+                task.setdefault('timings', {})['enqueued'] = now
+            if self.journal is not None:
+                self.journal.record_enqueue_many(tasks)
+            enqueued_at = time.monotonic()
+            for task in tasks:
+                self._queue.push(task, enqueued_at)
+                self._publish('enqueue', task=task)
+            self.stats['enqueued'] += len(tasks)
+            self._start_worker()
+            self._cond.notify_all()
+        return tasks
+
+    def recover(self):
+        """
+        Reloads tasks from the journal: tasks that were in flight when the process stopped
+        go first (they are run again), followed by the ones still waiting.
+        """
+        if self.journal is None:
+            return 0
+        try:
+            pending, in_flight = self.journal.recover()
+        except OSError as e:
+            logger.error(f"Could not read the queue journal; starting with an empty queue: {e}")
+            return 0
+        now = time.monotonic()
+        with self._cond:
+            for task in in_flight:
+                task['recovered'] = True
+            for task in pending:
+                self._queue.push(task, now)
+            for task in reversed(in_flight):
+                self._queue.push(task, now, front=True)
+            for task in in_flight + pending:
+                self._publish('enqueue', task=task)
+            if self._queue:
+                self._start_worker()
+                self._cond.notify_all()
+        if in_flight or pending:
+            logger.info(f"Recovered {len(pending)} queued and {len(in_flight)} interrupted task(s) from the queue journal.")
+        return len(in_flight) + len(pending)
+
+    def mark_stage(self, task, stage):
+        """Stamps an intermediate stage ('window_ready', 'pasted') on a running task."""
+        with self._cond:
+            task.setdefault('timings', {})[stage] = time.time()
+
+    def mark_busy(self, project_path=None):
+        """
+        Something (a queued task, a chat request, a manual message) is using the automation
+        for `project_path`. Also the running task's heartbeat for the watchdog.
+        """
+        with self._cond:
+            lane = self._lane_for(project_path)
+            if lane is None:
+                self.stats['unattributed_activity'] += 1
+                return
+            was_busy = lane.busy
+            lane.busy = True
+            lane.last_activity = time.monotonic()
+            self.stats['heartbeats'] += 1
+            if not was_busy:
+                self._publish('busy', lane)
+            self._cond.notify_all()
+
+    def cancel(self, task_id):
+        """
+        Cancels a task. Returns 'removed' if it was still queued, 'cancelling' if it is
+        running (it is retired once its window goes quiet), or None if it is unknown.
+        """
+        with self._cond:
+            task = self._queue.remove(task_id)
+            if task is not None:
+                self.stats['cancelled'] += 1
+                if self.journal is not None:
+                    self.journal.record_done(task_id)
+                if self.metrics is not None:
+                    self.metrics.record(task, 'cancel')
+                self._publish('cancel', task=task)
+                return 'removed'
+            for lane in self.lanes:
+                if lane.current is not None and lane.current['id'] == task_id:
+                    lane.verdict = ('cancel', 'Cancelled')
+                    self._cond.notify_all()
+                    return 'cancelling'
+            return None
+
+    def _finish_current(self, lane, outcome, error=None):
+        """Retires the lane's task with the given outcome. Caller holds the lock and has updated lane.busy."""
+        task = lane.current
+        if task is None:
+            return
+        lane.current = None
+        lane.verdict = None
+        task.setdefault('timings', {})['completed'] = time.time()
+        if self.journal is not None:
+            self.journal.record_done(task['id'])
+        if self.metrics is not None:
+            self.metrics.record(task, outcome)
+        if error is None:
+            self._publish(outcome, lane, task=task)
+        else:
+            self._publish(outcome, lane, task=task, error=error)
+
+    def _give_up_current(self, lane, outcome, reason):
+        """Ends a task the watchdog or a cancel gave up on: requeue it if it has runs left, else record `outcome`."""
+        task = lane.current
+        lane.busy = False
+        lane.idle_since = time.monotonic()
+        if outcome != 'cancel' and task.get('attempts', 1) < self.max_attempts:
+            logger.warning(f"Requeueing task {task['id']}: {reason}")
+            self.stats['requeued'] += 1
+            self._finish_current(lane, 'requeue', error=reason)
+            if self.journal is not None:
+                self.journal.record_enqueue(task)
+            self._queue.push(task, time.monotonic(), front=True)
+        else:
+            logger.warning(f"Giving up on task {task['id']}: {reason}")
+            self.stats['cancelled' if outcome == 'cancel' else 'failed'] += 1
+            self._finish_current(lane, outcome, error=reason)
+        self._cond.notify_all()
+
+    def _watch(self, lane):
+        """
+        One watchdog pass over a busy lane. Returns True if it changed state, otherwise waits
+        until the next moment something could change. Caller holds the lock.
+        """
+        now = time.monotonic()
+        idle_for = now - lane.last_activity
+        if lane.current is not None and lane.verdict is None and now >= lane.deadline:
+            self.stats['deadline_exceeded'] += 1
+            lane.verdict = ('fail', 'Deadline exceeded')
+        if idle_for >= self.timeout_seconds:
+            if lane.current is None:
+                logger.warning("Queue wait timeout exceeded, proceeding with next task.")
+                self.stats['timeouts'] += 1
+                lane.busy = False
+                lane.idle_since = now
+                self._publish('busy', lane)
+                return True
+            if lane.verdict is None:
+                self.stats['stalled'] += 1
+                lane.verdict = ('fail', f"No activity for {int(idle_for)}s")
+            self._give_up_current(lane, *lane.verdict)
+            return True
+        if lane.verdict is not None and idle_for >= self.quiet_seconds:
+            self._give_up_current(lane, *lane.verdict)
+            return True
+
+        wake = lane.last_activity + self.timeout_seconds
+        if lane.current is not None:
+            wake = min(wake, lane.last_activity + self.quiet_seconds if lane.verdict else lane.deadline)
+        self._cond.wait(max(0.0, wake - now))
+        return False
+
+    def mark_idle(self, project_path=None):
+        """The task for `project_path` finished; wakes its lane so the next task starts immediately."""
+        with self._cond:
+            lane = self._lane_for(project_path)
+            if lane is None:
+                self.stats['unattributed_activity'] += 1
+                return
+            was_busy = lane.busy
+            if was_busy:
+                lane.idle_since = time.monotonic()
+            lane.busy = False
+            if lane.current is not None:
+                self._finish_current(lane, 'complete')
+            elif was_busy:
+                self._publish('busy', lane)
+            self._cond.notify_all()
+
+    def set_affinity_window(self, window):
+        with self._cond:
+            self._queue.affinity_window = max(1, int(window))
+
+    def set_timeout(self, seconds):
+        with self._cond:
+            self.timeout_seconds = seconds
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """
+        Returns (queued tasks, lanes, busy) as one consistent view; lanes lists
+        {'lane', 'busy', 'task'} for every lane, with 'task' None when it runs nothing.
+        """
+        with self._cond:
+            return self._queue.tasks(), self._lane_states(), self.busy
+
+    def versioned_snapshot(self):
+        """Like snapshot(), plus the sequence number of the last event the view includes."""
+        with self._cond:
+            return self._queue.tasks(), self._lane_states(), self.busy, self.events.last_seq
+
+    def _next_task(self, lane):
+        with self._cond:
+            while True:
+                if lane.busy:
+                    self._watch(lane)
+                    continue
+                # Two lanes never drive the same project's window
+                exclude = {project_key(other.current) for other in self.lanes
+                           if other is not lane and other.current is not None} - {''}
+                popped = self._queue.pop(lane, exclude) if self._queue else None
+                if popped is not None:
+                    break
+                self._cond.wait()
+
+            task, enqueued_at = popped
+            now = time.monotonic()
+            # Time the task spent ready to run but not yet dispatched
+            handoff = now - max(enqueued_at, lane.idle_since)
+            self.stats['dispatched'] += 1
+            self.stats['handoff_total'] += handoff
+            self.stats['handoff_last'] = handoff
+            self.stats['handoff_max'] = max(self.stats['handoff_max'], handoff)
+            lane.current = task
+            lane.busy = True
+            lane.last_activity = now
+            lane.verdict = None
+            lane.deadline = now + float(task.get('deadline_seconds') or self.deadline_seconds)
+            task['attempts'] = task.get('attempts', 0) + 1
+            task.setdefault('timings', {})['started'] = time.time()
+            if self.journal is not None:
+                self.journal.record_start(task['id'])
+            self._publish('start', lane, task=task)
+            return task
+
+    def _run(self, lane):
+        while True:
+            task = self._next_task(lane)
+            try:
+                self.runner(task)
+            except Exception as e:
+                logger.error(f"Error processing queue item: {e}")
+                with self._cond:
+                    if lane.current is task:
+                        self._give_up_current(lane, 'fail', str(e))
+                    else:
+                        lane.busy = False
+                        lane.idle_since = time.monotonic()
+                        self._publish('busy', lane)
+                    self._cond.notify_all()
+
+    def get_stats(self):
+        with self._cond:
+            dispatched = self.stats['dispatched']
+            return {
+                'enqueued': self.stats['enqueued'],
+                'dispatched': dispatched,
+                'failed': self.stats['failed'],
+                'timeouts': self.stats['timeouts'],
+                'cancelled': self.stats['cancelled'],
+                'requeued': self.stats['requeued'],
+                'stalled': self.stats['stalled'],
+                'deadline_exceeded': self.stats['deadline_exceeded'],
+                'heartbeats': self.stats['heartbeats'],
+                'unattributed_activity': self.stats['unattributed_activity'],
+                'pending': len(self._queue),
+                'busy': self.busy,
+                'lanes': [{'index': lane.index, 'busy': lane.busy, 'task': lane.current['id'] if lane.current else None}
+                          for lane in self.lanes],
+                'handoff_ms_avg': round(self.stats['handoff_total'] / dispatched * 1000, 3) if dispatched else 0.0,
+                'handoff_ms_max': round(self.stats['handoff_max'] * 1000, 3),
+                'handoff_ms_last': round(self.stats['handoff_last'] * 1000, 3),
+                'affinity_window': self._queue.affinity_window,
+                'window_switches': self._queue.stats['window_switches'],
+                'window_switches_avoided': self._queue.stats['switches_avoided']
+            }
@@ -1,10 +1,17 @@
 import os
 import json
+import stat
+import time
 import ctypes
+import hashlib
+import threading
 import subprocess
 import logging
+from collections import namedtuple
+from datetime import datetime, timezone
 from urllib.parse import unquote
 from modules.config_utils import IGNORED_FILE
+from modules.path_probe import PathProber
 
 logger = logging.getLogger(__name__)
 
@@ -40,24 +47,88 @@ def force_bring_to_front(hwnd):
     except Exception as e:
         logger.error(f"Force focus failed: {e}")
 
-def load_ignored_folders():
-    if os.path.exists(IGNORED_FILE):
-        try:
-            with open(IGNORED_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return []
-
-def save_ignored_folder(path):
-    current_ignored = load_ignored_folders()
-    if path not in current_ignored:
-        current_ignored.append(path)
-        try:
-            with open(IGNORED_FILE, 'w') as f:
-                json.dump(current_ignored, f, indent=4)
-        except IOError as e:
-            logger.error(f"Failed to save ignored folder: {e}")
+def normalize_path(path):
+    return os.path.normcase(os.path.normpath(path))
+
+class IgnoreRegistry:
+    """
+    The ignored project folders, loaded from `path` once and kept as a set of normalized
+    paths, so membership is a set lookup however many projects are checked. Changes are
+    written through to the file atomically (temp file + rename) before they are applied.
+    """
+    def __init__(self, path=IGNORED_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._paths = None
+
+    def _ensure_loaded(self):
+        if self._paths is not None:
+            return
+        entries = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    entries = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+        # Normalized path -> path as the user added it, in the order they were added
+        self._paths = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, str) and entry:
+                self._paths.setdefault(normalize_path(entry), entry)
+
+    def _write(self, paths):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(list(paths.values()), f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def paths(self):
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._paths.values())
+
+    def normalized(self):
+        """A snapshot of the normalized ignored paths."""
+        with self._lock:
+            self._ensure_loaded()
+            return frozenset(self._paths)
+
+    def is_ignored(self, path):
+        if not path:
+            return False
+        with self._lock:
+            self._ensure_loaded()
+            return normalize_path(path) in self._paths
+
+    def add(self, path):
+        """Ignores `path`; returns False if it already was. Raises OSError if the file cannot be written."""
+        key = normalize_path(path)
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._paths:
+                return False
+            paths = dict(self._paths)
+            paths[key] = path
+            self._write(paths)
+            self._paths = paths
+            return True
+
+    def remove(self, path):
+        """Stops ignoring `path`; returns False if it was not ignored. Raises OSError if the file cannot be written."""
+        key = normalize_path(path)
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._paths:
+                return False
+            paths = {k: v for k, v in self._paths.items() if k != key}
+            self._write(paths)
+            self._paths = paths
+            return True
+
+ignore_registry = IgnoreRegistry()
 
 def find_vscode_executable():
     appdata_path = os.environ.get('LOCALAPPDATA', '')
@@ -87,45 +158,284 @@ def find_vscode_executable():
         pass
     return None
 
-def get_vscode_projects():
+STAT_TTL_SECONDS = 10.0
+
+# Shared by the project and icon indexes
+path_prober = PathProber()
+
+def get_storage_paths():
+    """VS Code's global storage.json for each supported flavour, in order of preference."""
+    appdata = os.environ.get('APPDATA', '')
+    return [
+        os.path.join(appdata, 'Code', 'User', 'globalStorage', 'storage.json'),
+        os.path.join(appdata, 'Code - Insiders', 'User', 'globalStorage', 'storage.json'),
+        os.path.join(appdata, 'VSCodium', 'User', 'globalStorage', 'storage.json')
+    ]
+
+def _uri_to_path(uri):
+    if os.name == 'nt':
+        return unquote(uri[8:]).replace('/', '\\')
+    return unquote(uri[7:])
+
+def _stat_folder(path):
     try:
-        possible_paths = [
-            os.path.join(os.environ.get('APPDATA', ''), 'Code', 'User', 'globalStorage', 'storage.json'),
-            os.path.join(os.environ.get('APPDATA', ''), 'Code - Insiders', 'User', 'globalStorage', 'storage.json'),
-            os.path.join(os.environ.get('APPDATA', ''), 'VSCodium', 'User', 'globalStorage', 'storage.json')
-        ]
-        storage_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                storage_path = path
-                break
-        if not storage_path:
+        st = os.stat(path)
+    except OSError:
+        return False, 0
+    return stat.S_ISDIR(st.st_mode), st.st_mtime
+
+class ProjectIndex:
+    """
+    Cached view of the workspaces VS Code knows about. storage.json is parsed again only
+    when its mtime or size changes; each workspace's isdir / mtime result is reused for
+    `stat_ttl` seconds, so the dashboard routes and window matching stop hitting the disk
+    on every call.
+
+    Stats run on `prober` (a PathProber) in parallel under a deadline. A workspace on a
+    share that does not answer in time stays listed with its last known mtime and shows
+    up in unavailable(); when its stat finally returns the index picks the result up.
+    """
+    def __init__(self, stat_ttl=STAT_TTL_SECONDS, storage_paths=None, prober=None):
+        self.stat_ttl = stat_ttl
+        self.storage_paths = storage_paths
+        self.prober = prober or path_prober
+        self._lock = threading.Lock()
+        self._late_lock = threading.Lock()
+        self._late = []
+        self._storage_key = None
+        self._workspaces = []
+        self._stat_cache = {}
+        self._projects = []
+        self._by_name = {}
+        self._valid_until = 0.0
+        self.stats = {'calls': 0, 'parses': 0, 'stats': 0, 'rebuilds': 0}
+
+    def _find_storage(self):
+        for path in self.storage_paths or get_storage_paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return path, st.st_mtime_ns, st.st_size
+        return None
+
+    def _load_workspaces(self, storage_key):
+        if storage_key is None:
+            return []
+        try:
+            with open(storage_key[0], 'r', encoding='utf-8') as f:
+                storage_data = json.load(f)
+        except (OSError, ValueError) as e:
+            # Usually VS Code mid-write; the next write changes the mtime and we try again
+            logger.error(f"Error reading {storage_key[0]}: {e}")
             return []
-        with open(storage_path, 'r', encoding='utf-8') as f:
-            storage_data = json.load(f)
-        project_uris = list(storage_data.get('profileAssociations', {}).get('workspaces', {}).keys())
-        cleaned_paths = []
-        for uri in project_uris:
-            if uri.startswith('file:///'):
-                path = unquote(uri[8:]).replace('/', '\\')
-                cleaned_paths.append(path)
-        folder_paths = [p for p in cleaned_paths if os.path.isdir(p)]
-        return sorted(folder_paths, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0, reverse=True)
+        self.stats['parses'] += 1
+        project_uris = storage_data.get('profileAssociations', {}).get('workspaces', {}).keys()
+        return [_uri_to_path(uri) for uri in project_uris if uri.startswith('file:///')]
+
+    def _late_stat(self, path, result):
+        # Called from a probe thread that may finish while _refresh holds the main lock
+        with self._late_lock:
+            self._late.append((path, result))
+
+    def _stat_all(self, now):
+        with self._late_lock:
+            late, self._late = self._late, []
+        for path, result in late:
+            if result is not None:
+                self._stat_cache[path] = (now,) + result
+        stale = [path for path in self._workspaces
+                 if path not in self._stat_cache or now - self._stat_cache[path][0] >= self.stat_ttl]
+        if stale:
+            self.stats['stats'] += len(stale)
+            results, missing = self.prober.probe('stat', _stat_folder, stale, on_late=self._late_stat)
+            for path, result in results.items():
+                self._stat_cache[path] = (now,) + (result or (False, 0))
+            for path in missing:
+                # Keep the last known answer (or assume it is still a folder) and ask again soon
+                previous = self._stat_cache.get(path)
+                self._stat_cache[path] = (now - self.stat_ttl + 1.0, True, previous[2] if previous else 0)
+        return [(path, self._stat_cache[path]) for path in self._workspaces]
+
+    def _refresh(self):
+        now = time.monotonic()
+        storage_key = self._find_storage()
+        with self._late_lock:
+            has_late = bool(self._late)
+        if storage_key == self._storage_key and now < self._valid_until and not has_late:
+            return
+        if storage_key != self._storage_key:
+            self._workspaces = self._load_workspaces(storage_key)
+            self._storage_key = storage_key
+            live = set(self._workspaces)
+            self._stat_cache = {path: cached for path, cached in self._stat_cache.items() if path in live}
+        entries = self._stat_all(now)
+        folders = [(path, cached) for path, cached in entries if cached[1]]
+        folders.sort(key=lambda entry: entry[1][2], reverse=True)
+        self._projects = [path for path, _ in folders]
+        self._by_name = {}
+        for path in self._projects:
+            self._by_name.setdefault(os.path.basename(path), path)
+        self._valid_until = min((cached[0] for _, cached in entries), default=now) + self.stat_ttl
+        self.stats['rebuilds'] += 1
+
+    def projects(self):
+        """Existing workspace folders, most recently modified first."""
+        with self._lock:
+            self.stats['calls'] += 1
+            self._refresh()
+            return list(self._projects)
+
+    def find_by_name(self, project_name):
+        """The most recently modified workspace whose folder name is `project_name`, or None."""
+        with self._lock:
+            self.stats['calls'] += 1
+            self._refresh()
+            return self._by_name.get(project_name)
+
+    def unavailable(self):
+        """Workspaces whose last stat did not answer within the prober's deadline."""
+        unavailable = self.prober.unavailable()
+        with self._lock:
+            return {path for path in self._projects if path in unavailable}
+
+    def invalidate(self):
+        with self._lock:
+            self._storage_key = None
+            self._stat_cache.clear()
+            self._valid_until = 0.0
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, workspaces=len(self._workspaces), projects=len(self._projects),
+                         stat_ttl=self.stat_ttl, storage_path=self._storage_key[0] if self._storage_key else None)
+        return dict(stats, prober=self.prober.get_stats())
+
+project_index = ProjectIndex()
+
+def get_vscode_projects():
+    try:
+        return project_index.projects()
     except Exception as e:
         logger.error(f"Error getting projects: {e}")
         return []
 
-def find_project_icon(project_path):
-    try:
-        if not os.path.isdir(project_path):
+MAX_CACHED_ICON_BYTES = 1024 * 1024
+
+IconEntry = namedtuple('IconEntry', ['path', 'data', 'etag', 'last_modified', 'mtime_ns', 'size'])
+
+class IconIndex:
+    """
+    Project path -> icon file, re-scanned only when the project folder's mtime changes
+    (adding, removing or renaming a file updates it). Icon bytes are kept in memory,
+    keyed by the icon's own mtime and size, so /get_icon can answer without touching
+    anything but two stat calls. The last answer for each project is also remembered, so
+    a project on a share that is slow to respond can still show the icon it had.
+    """
+    def __init__(self, max_icon_bytes=MAX_CACHED_ICON_BYTES):
+        self.max_icon_bytes = max_icon_bytes
+        self._lock = threading.Lock()
+        self._dirs = {}
+        self._files = {}
+        self._known = {}
+        self.stats = {'lookups': 0, 'scans': 0, 'loads': 0, 'bytes_cached': 0, 'late': 0}
+
+    def find(self, project_path):
+        """Path of the first .ico file in the project folder, or None."""
+        try:
+            st = os.stat(project_path)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(st.st_mode):
             return None
+        with self._lock:
+            self.stats['lookups'] += 1
+            cached = self._dirs.get(project_path)
+            if cached is not None and cached[0] == st.st_mtime_ns:
+                return cached[1]
+        icon_path = None
         for item in os.listdir(project_path):
             if item.lower().endswith('.ico'):
-                return os.path.join(project_path, item)
+                icon_path = os.path.join(project_path, item)
+                break
+        with self._lock:
+            self.stats['scans'] += 1
+            self._dirs[project_path] = (st.st_mtime_ns, icon_path)
+        return icon_path
+
+    def load(self, project_path):
+        """The project's icon as an IconEntry (bytes plus validators), or None."""
+        icon_path = self.find(project_path)
+        if icon_path is None:
+            return None
+        try:
+            st = os.stat(icon_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._files.get(icon_path)
+        if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            return entry
+        with open(icon_path, 'rb') as f:
+            data = f.read()
+        entry = IconEntry(icon_path, data, hashlib.sha1(data).hexdigest()[:16],
+                          datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            self.stats['loads'] += 1
+            old = self._files.pop(icon_path, None)
+            if old is not None:
+                self.stats['bytes_cached'] -= old.size
+            if len(data) <= self.max_icon_bytes:
+                self._files[icon_path] = entry
+                self.stats['bytes_cached'] += entry.size
+        return entry
+
+    def remember(self, project_path, icon_path, late=False):
+        """Records the latest lookup result for a project, including one that finished after its deadline."""
+        with self._lock:
+            self._known[project_path] = icon_path
+            if late:
+                self.stats['late'] += 1
+
+    def last_known(self, project_path):
+        """(True, icon path or None) if the project has been looked up before, else (False, None)."""
+        with self._lock:
+            if project_path in self._known:
+                return True, self._known[project_path]
+            return False, None
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, folders=len(self._dirs), icons=len(self._files))
+
+icon_index = IconIndex()
+
+def find_project_icon(project_path):
+    try:
+        return icon_index.find(project_path)
     except Exception as e:
         logger.error(f"Error looking for icon in {project_path}: {e}")
     return None
 
+def _late_icon(project_path, icon_path):
+    icon_index.remember(project_path, icon_path, late=True)
+
+def find_project_icons(project_paths):
+    """
+    Looks up icons for many projects at once on the shared prober. Returns (icons, unavailable):
+    icons maps each path to its icon path (or None); unavailable is the set of paths that did
+    not answer in time. Those keep the icon from their last lookup, and a lookup that finishes
+    late is remembered for the next call.
+    """
+    icons, missing = path_prober.probe('icon', find_project_icon, project_paths, on_late=_late_icon)
+    for path, icon_path in icons.items():
+        icon_index.remember(path, icon_path)
+    for path in missing:
+        known, icon_path = icon_index.last_known(path)
+        if known:
+            icons[path] = icon_path
+    return icons, set(missing)
+
 def get_active_windows():
     active_list = []
     if not gw:
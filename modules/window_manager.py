@@ -38,22 +38,33 @@ def focus_and_maximize_window(title_to_find, is_exact_match=False):
         logger.error(f"Error focusing window: {e}")
         return None
 
-def wait_for_vscode_window(project_name, timeout_deciseconds=100):
+def find_vscode_window(project_name, timeout_deciseconds=100):
     """
-    Polls for a VS Code window matching the project name.
+    Polls for a VS Code window matching the project name and returns it, or None.
+    Only reads window titles, so it never touches focus, keyboard or clipboard.
     """
     for _ in range(timeout_deciseconds):
         time.sleep(0.1)
         if gw:
-            windows = gw.getWindowsWithTitle(project_name)
-            for win in windows:
+            for win in gw.getWindowsWithTitle(project_name):
                 if "Visual Studio Code" in win.title:
-                    try:
-                        force_bring_to_front(win._hWnd)
-                        if optimiseWait:
-                            optimiseWait('maximize', autopath='linkimages')
-                        return True
-                    except Exception as e:
-                        logger.error(f"Error focusing new window: {e}")
-                    break
-    return False
\ No newline at end of file
+                    return win
+    return None
+
+def focus_vscode_window(win):
+    """Brings a VS Code window to the front and maximizes it. Returns True on success."""
+    try:
+        force_bring_to_front(win._hWnd)
+        if optimiseWait:
+            optimiseWait('maximize', autopath='linkimages')
+        return True
+    except Exception as e:
+        logger.error(f"Error focusing new window: {e}")
+        return False
+
+def wait_for_vscode_window(project_name, timeout_deciseconds=100):
+    """
+    Polls for a VS Code window matching the project name and focuses it.
+    """
+    win = find_vscode_window(project_name, timeout_deciseconds)
+    return focus_vscode_window(win) if win is not None else False
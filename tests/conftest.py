@@ -0,0 +1,15 @@
+import os
+import sys
+import time
+
+# The modules are imported as `modules.<name>`, the way main.py imports them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def wait_for(predicate, timeout=5.0, interval=0.01):
+    """Polls `predicate` until it is true; returns its last value."""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value or time.monotonic() >= deadline:
+            return value
+        time.sleep(interval)
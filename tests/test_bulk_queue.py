@@ -0,0 +1,88 @@
+import pytest
+
+from modules.bulk_queue import MAX_BULK_TASKS, BulkQueueError, build_bulk_tasks, render_message, select_projects
+
+PROJECTS = ['/work/alpha', '/work/beta', '/work/gamma', '/other/alpha-docs']
+
+def test_explicit_paths_keep_request_order_without_duplicates():
+    selected, invalid = select_projects(PROJECTS, ['/work/gamma', '/work/alpha/', '/work/gamma'])
+    assert selected == ['/work/gamma', '/work/alpha']
+    assert invalid == []
+
+def test_path_prefix_does_not_match_sibling_directories():
+    projects = ['/work/app', '/work/app/sub', '/work/app-old', '/work/apple']
+    assert select_projects(projects, None, {'path_prefix': '/work/app'}) == (['/work/app', '/work/app/sub'], [])
+    assert select_projects(projects, None, {'path_prefix': '/work/app/'}) == (['/work/app', '/work/app/sub'], [])
+    assert select_projects(projects, None, {'path_prefix': '/'}) == (projects, [])
+
+def test_unknown_paths_are_reported():
+    selected, invalid = select_projects(PROJECTS, ['/work/alpha', '/nowhere'])
+    assert selected == ['/work/alpha']
+    assert invalid == ['/nowhere']
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'all': True}, PROJECTS),
+    ({'name': 'ALPHA*'}, ['/work/alpha', '/other/alpha-docs']),
+    ({'path_prefix': '/work'}, ['/work/alpha', '/work/beta', '/work/gamma']),
+    ({'all': True, 'exclude': ['/work/beta', '/other/alpha-docs']}, ['/work/alpha', '/work/gamma']),
+    ({}, []),
+])
+def test_filters(filters, expected):
+    assert select_projects(PROJECTS, None, filters) == (expected, [])
+
+@pytest.mark.parametrize('project_paths, filters', [
+    ('/work/alpha', None),
+    (['/work/alpha', 3], None),
+    ({'path': '/work/alpha'}, None),
+    (None, 'all'),
+    (None, ['all']),
+    (None, {'name': 5}),
+    (None, {'path_prefix': ['/work']}),
+    (None, {'all': True, 'exclude': '/work/beta'}),
+])
+def test_malformed_selection_raises(project_paths, filters):
+    with pytest.raises(BulkQueueError):
+        select_projects(PROJECTS, project_paths, filters)
+
+def test_build_renders_each_message():
+    tasks, skipped = build_bulk_tasks({'message': 'Fix {project_name} ({index}/{count}) in {project_path}; keep {braces}',
+                                       'project_paths': ['/work/beta', '/work/alpha'], 'priority': '2',
+                                       'deadline_minutes': '10'}, PROJECTS)
+    assert skipped == []
+    assert [task['message'] for task in tasks] == ['Fix beta (1/2) in /work/beta; keep {braces}',
+                                                   'Fix alpha (2/2) in /work/alpha; keep {braces}']
+    assert all(task['priority'] == 2 and task['deadline_seconds'] == 600 for task in tasks)
+    assert len({task['id'] for task in tasks}) == 2
+
+def test_unknown_paths_fail_the_whole_request_unless_skipped():
+    data = {'message': 'go', 'project_paths': ['/work/alpha', '/nowhere']}
+    with pytest.raises(BulkQueueError) as error:
+        build_bulk_tasks(data, PROJECTS)
+    assert error.value.invalid == ['/nowhere']
+
+    tasks, skipped = build_bulk_tasks(dict(data, skip_invalid=True), PROJECTS)
+    assert [task['project_path'] for task in tasks] == ['/work/alpha']
+    assert skipped == ['/nowhere']
+
+@pytest.mark.parametrize('data', [
+    {'project_paths': ['/work/alpha']},
+    {'message': '   ', 'project_paths': ['/work/alpha']},
+    {'message': ['go'], 'project_paths': ['/work/alpha']},
+    {'message': 'go'},
+    {'message': 'go', 'filter': {'name': 'nothing*'}},
+    {'message': 'go', 'filter': 'all'},
+    {'message': 'go', 'project_paths': '/work/alpha'},
+    {'message': 'go', 'project_paths': ['/work/alpha'], 'priority': 'high'},
+    {'message': 'go', 'project_paths': ['/work/alpha'], 'deadline_minutes': 'soon'},
+])
+def test_unusable_requests_raise_bulk_queue_error(data):
+    with pytest.raises(BulkQueueError):
+        build_bulk_tasks(data, PROJECTS)
+
+def test_too_many_projects_are_rejected():
+    projects = [f"/work/p{i}" for i in range(MAX_BULK_TASKS + 1)]
+    with pytest.raises(BulkQueueError):
+        build_bulk_tasks({'message': 'go', 'filter': {'all': True}}, projects)
+
+def test_render_message_leaves_unknown_placeholders_alone():
+    assert render_message('{project_name} {json} {index}', '/work/alpha', 1, 3) == 'alpha {json} 1'
@@ -0,0 +1,47 @@
+import threading
+
+from modules.event_log import EventLog
+
+def test_since_returns_events_after_a_sequence_number():
+    log = EventLog()
+    for kind in ('enqueue', 'start', 'complete'):
+        log.publish(kind, task_id='a')
+    events, complete = log.since(1)
+    assert complete
+    assert [event['type'] for event in events] == ['start', 'complete']
+    assert [event['seq'] for event in events] == [2, 3]
+    assert log.since(3) == ([], True)
+
+def test_reader_that_fell_behind_is_told_to_resnapshot():
+    log = EventLog(capacity=3)
+    for n in range(5):
+        log.publish('busy', n=n)
+    events, complete = log.since(1)
+    assert not complete
+    # Exactly at the edge of what is kept, the history is still whole
+    events, complete = log.since(2)
+    assert complete and [event['seq'] for event in events] == [3, 4, 5]
+
+def test_sequence_from_the_future_is_incomplete():
+    log = EventLog()
+    log.publish('busy')
+    assert log.since(7) == ([], False)
+
+def test_wait_blocks_until_a_new_event():
+    log = EventLog()
+    log.publish('enqueue')
+    timer = threading.Timer(0.05, lambda: log.publish('start'))
+    timer.start()
+    events, complete = log.wait(1, timeout=5)
+    timer.join()
+    assert complete and [event['type'] for event in events] == ['start']
+
+def test_wait_times_out_with_nothing_new():
+    log = EventLog()
+    log.publish('enqueue')
+    assert log.wait(1, timeout=0.01) == ([], True)
+
+def test_each_log_has_its_own_epoch():
+    first = EventLog()
+    threading.Event().wait(0.002)
+    assert first.epoch != EventLog().epoch
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from modules.vscode_utils import IgnoreRegistry, normalize_path
+
+def read_file(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_add_writes_through_and_survives_a_reload(tmp_path):
+    path = str(tmp_path / 'ignored_folders.json')
+    registry = IgnoreRegistry(path)
+    assert registry.add('/work/alpha')
+    assert read_file(path) == ['/work/alpha']
+    assert IgnoreRegistry(path).is_ignored('/work/alpha')
+
+def test_paths_are_compared_normalized(tmp_path):
+    registry = IgnoreRegistry(str(tmp_path / 'ignored_folders.json'))
+    registry.add('/work/alpha/')
+    assert registry.is_ignored('/work/./alpha')
+    assert not registry.add('/work/alpha')
+    assert registry.paths() == ['/work/alpha/']
+    assert registry.normalized() == {normalize_path('/work/alpha')}
+
+def test_remove_writes_through(tmp_path):
+    path = str(tmp_path / 'ignored_folders.json')
+    registry = IgnoreRegistry(path)
+    registry.add('/work/alpha')
+    registry.add('/work/beta')
+    assert registry.remove('/work/alpha/')
+    assert not registry.remove('/work/alpha')
+    assert read_file(path) == ['/work/beta']
+    assert not os.path.exists(path + '.tmp')
+
+def test_failed_write_leaves_the_registry_unchanged(tmp_path):
+    registry = IgnoreRegistry(str(tmp_path / 'missing' / 'ignored_folders.json'))
+    with pytest.raises(OSError):
+        registry.add('/work/alpha')
+    assert not registry.is_ignored('/work/alpha')
+    assert registry.paths() == []
+
+def test_unreadable_or_malformed_file_loads_as_empty(tmp_path):
+    path = tmp_path / 'ignored_folders.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert IgnoreRegistry(str(path)).paths() == []
+    path.write_text(json.dumps(['/work/alpha', 7, '', '/work/alpha/']), encoding='utf-8')
+    assert IgnoreRegistry(str(path)).paths() == ['/work/alpha']
+
+def test_empty_path_is_never_ignored(tmp_path):
+    registry = IgnoreRegistry(str(tmp_path / 'ignored_folders.json'))
+    assert not registry.is_ignored('')
+    assert not registry.is_ignored(None)
@@ -0,0 +1,58 @@
+import base64
+import io
+
+from PIL import Image
+
+from modules.image_pipeline import ImageIngestor, count_images
+
+def data_uri(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (10, 20, 30)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def test_small_images_pass_through_unchanged():
+    uri = data_uri(40, 30)
+    [image] = ImageIngestor(max_pixels=10_000).ingest([uri])
+    assert image.data_uri == uri
+    assert (image.width, image.height, image.downscaled) == (40, 30, False)
+
+def test_oversized_images_are_downscaled_to_the_budget():
+    [image] = ImageIngestor(max_pixels=10_000).ingest([data_uri(400, 100)])
+    assert image.downscaled
+    assert image.width * image.height <= 10_000
+    assert image.data_uri.startswith('data:image/png;base64,')
+
+def test_repeated_images_are_prepared_once():
+    ingestor = ImageIngestor()
+    uri = data_uri(20, 20)
+    ingestor.ingest([uri, uri])
+    ingestor.ingest([uri])
+    stats = ingestor.get_stats()
+    assert stats['decoded'] == 1 and stats['cache_hits'] == 1
+
+def test_clipboard_bitmap_is_only_built_on_request():
+    ingestor = ImageIngestor()
+    images = ingestor.ingest([data_uri(20, 20), data_uri(30, 10)])
+    assert ingestor.get_stats()['dibs'] == 0
+
+    dib = ingestor.clipboard_dib(images[-1])
+    assert ingestor.clipboard_dib(images[-1]) == dib
+    stats = ingestor.get_stats()
+    assert (stats['dibs'], stats['dib_cache_hits']) == (1, 1)
+    # BITMAPINFOHEADER: 40-byte header, then width and height
+    assert int.from_bytes(dib[0:4], 'little') == 40
+    assert int.from_bytes(dib[4:8], 'little') == 30
+
+def test_undecodable_image_is_passed_on_as_is():
+    ingestor = ImageIngestor()
+    uri = 'data:image/png;base64,' + base64.b64encode(b'not a png').decode('ascii')
+    [image] = ingestor.ingest([uri])
+    assert image.data_uri == uri and image.width == 0
+    assert ingestor.clipboard_dib(image) is None
+
+def test_count_images_counts_inline_images_only():
+    content = [{'type': 'text', 'text': 'hi'},
+               {'type': 'image_url', 'image_url': {'url': data_uri(2, 2)}},
+               {'type': 'image_url', 'image_url': {'url': 'https://example.com/a.png'}}]
+    assert count_images(content) == 1
+    assert count_images('plain text') == 0
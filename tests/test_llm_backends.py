@@ -0,0 +1,36 @@
+import pytest
+
+from modules import llm_backends
+from modules.llm_backends import FAKE_MODEL, LLMBackend, available_models, get_backend, init_backends, parse_min_interval
+
+@pytest.fixture
+def restore_backends():
+    saved = dict(llm_backends._backends)
+    yield
+    llm_backends._backends = saved
+
+def test_fake_backend_is_off_by_default(restore_backends):
+    init_backends({})
+    assert FAKE_MODEL not in available_models()
+    assert get_backend(FAKE_MODEL) is None
+    assert set(llm_backends.BROWSER_MODELS) <= set(available_models())
+
+def test_fake_backend_behind_the_config_flag(restore_backends):
+    init_backends({'enable_fake_backend': 'True', 'fake_backend_latency': '0'})
+    assert FAKE_MODEL in available_models()
+    assert 'Fake completion' in get_backend(FAKE_MODEL).complete("prompt", [])
+
+def test_backends_must_implement_complete():
+    class Incomplete(LLMBackend):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete('incomplete')
+
+def test_parse_min_interval():
+    assert parse_min_interval('2.5') == 2.5
+    assert parse_min_interval(0) == 0.0
+
+@pytest.mark.parametrize('value', ['fast', None, [1], -1, 'inf', 'nan'])
+def test_parse_min_interval_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        parse_min_interval(value)
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from conftest import wait_for
+from modules import vscode_utils
+from modules.path_probe import PathProber
+from modules.vscode_utils import IconIndex, find_project_icons
+
+@pytest.fixture
+def slow_share(tmp_path, monkeypatch):
+    """A project folder with an icon whose lookups block until `release` is set."""
+    project = tmp_path / 'alpha'
+    project.mkdir()
+    (project / 'app.ico').write_bytes(b'icon')
+    release = threading.Event()
+    index = IconIndex()
+
+    def slow_find(project_path):
+        release.wait(5)
+        return index.find(project_path)
+
+    monkeypatch.setattr(vscode_utils, 'path_prober', PathProber(deadline=0.05))
+    monkeypatch.setattr(vscode_utils, 'icon_index', index)
+    monkeypatch.setattr(vscode_utils, 'find_project_icon', slow_find)
+    yield str(project), release, index
+    release.set()
+
+def test_late_icon_lookup_is_kept_for_the_next_call(slow_share):
+    path, release, index = slow_share
+    icons, unavailable = find_project_icons([path])
+    assert unavailable == {path}
+    assert path not in icons
+
+    release.set()
+    assert wait_for(lambda: index.last_known(path)[0])
+    assert index.get_stats()['late'] == 1
+
+    release.clear()
+    icons, unavailable = find_project_icons([path])
+    assert unavailable == {path}
+    assert icons[path].endswith('app.ico')
+
+def test_icon_answered_in_time_is_remembered(slow_share):
+    path, release, index = slow_share
+    release.set()
+    icons, unavailable = find_project_icons([path])
+    assert not unavailable
+    assert index.last_known(path) == (True, icons[path])
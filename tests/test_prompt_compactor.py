@@ -0,0 +1,98 @@
+import copy
+
+from modules.prompt_compactor import DEFAULT_SETTINGS, compact_request, get_compaction_settings
+
+BIG = 'x' * 9000
+
+def settings(**overrides):
+    return dict(DEFAULT_SETTINGS, **overrides)
+
+def tool_turn(text, tool="read_file for 'a.py'"):
+    return {'role': 'user', 'content': [{'type': 'text', 'text': f"[{tool}] Result:"}, {'type': 'text', 'text': text}]}
+
+def conversation(turns):
+    messages = [{'role': 'system', 'content': 'You are Cline.'},
+                {'role': 'user', 'content': [{'type': 'text', 'text': f"<task>{BIG}</task>"}]}]
+    for turn in turns:
+        messages.append({'role': 'assistant', 'content': 'working'})
+        messages.append(turn)
+    return {'messages': messages}
+
+def texts(message):
+    return [part['text'] for part in message['content']]
+
+def test_defaults_are_lossless():
+    request = conversation([tool_turn(BIG + str(i)) for i in range(10)])
+    compacted, stats = compact_request(request, settings())
+    assert stats['chars_before'] == stats['chars_after']
+    assert compacted['messages'][3] == request['messages'][3]
+
+def test_truncation_is_opt_in_and_only_hits_stale_tool_output():
+    request = conversation([tool_turn(BIG + str(i)) for i in range(10)])
+    compacted, stats = compact_request(request, settings(truncate_stale=True))
+    assert stats['chars_after'] < stats['chars_before']
+
+    oldest = texts(compacted['messages'][3])
+    assert oldest[0] == "[read_file for 'a.py'] Result:"
+    assert len(oldest[1]) < 4100 and 'truncated by Cline-X' in oldest[1]
+    # The most recent turns are never truncated
+    assert texts(compacted['messages'][-1])[1] == BIG + '9'
+
+def test_task_message_is_kept_verbatim():
+    request = conversation([tool_turn(BIG + str(i)) for i in range(10)])
+    compacted, _ = compact_request(request, settings(truncate_stale=True))
+    assert compacted['messages'][1] == request['messages'][1]
+
+def test_user_instructions_are_never_truncated_or_deduplicated():
+    feedback = {'role': 'user', 'content': [{'type': 'text', 'text': 'please ' + BIG}]}
+    request = conversation([feedback, copy.deepcopy(feedback)] + [tool_turn(str(i)) for i in range(8)])
+    compacted, _ = compact_request(request, settings(truncate_stale=True))
+    assert compacted['messages'][3] == feedback
+    assert compacted['messages'][5] == feedback
+
+def test_only_the_newest_copy_of_repeated_tool_output_is_kept():
+    request = conversation([tool_turn(BIG), tool_turn('other output'), tool_turn(BIG)])
+    compacted, _ = compact_request(request, settings())
+    assert texts(compacted['messages'][3])[1].startswith('[Duplicate tool output omitted')
+    assert texts(compacted['messages'][-1])[1] == BIG
+
+def test_header_in_the_same_block_marks_tool_output():
+    turn = {'role': 'user', 'content': f"[execute_command for 'ls'] Result:\n{BIG}"}
+    request = conversation([turn, tool_turn('a'), tool_turn('b'), tool_turn('c'), tool_turn('d')])
+    compacted, _ = compact_request(request, settings(truncate_stale=True, keep_recent_messages=2))
+    assert 'truncated by Cline-X' in compacted['messages'][3]['content']
+
+def test_repeated_file_content_is_replaced_in_older_messages():
+    body = 'line\n' * 200
+    file_turn = tool_turn(f'<file_content path="a.py">{body}</file_content>')
+    request = conversation([file_turn, tool_turn('other'), copy.deepcopy(file_turn)])
+    compacted, _ = compact_request(request, settings())
+    assert '[Unchanged: identical content' in texts(compacted['messages'][3])[1]
+    assert body in texts(compacted['messages'][-1])[1]
+
+def test_environment_details_are_dropped_from_older_messages_only():
+    details = '<environment_details>cwd: /work</environment_details>'
+    request = conversation([tool_turn('first\n' + details), tool_turn('second\n' + details)])
+    compacted, _ = compact_request(request, settings())
+    assert '<environment_details>' not in texts(compacted['messages'][3])[1]
+    assert '<environment_details>' in texts(compacted['messages'][-1])[1]
+
+def test_assistant_turns_and_the_original_request_are_untouched():
+    request = conversation([tool_turn(BIG), tool_turn(BIG)])
+    request['messages'][2]['content'] = BIG
+    original = copy.deepcopy(request)
+    compacted, _ = compact_request(request, settings(truncate_stale=True, keep_recent_messages=1))
+    assert request == original
+    assert compacted['messages'][2]['content'] == BIG
+
+def test_disabled_returns_the_request_unchanged():
+    request = conversation([tool_turn(BIG), tool_turn(BIG)])
+    compacted, stats = compact_request(request, settings(enabled=False))
+    assert compacted is request
+    assert stats['chars_before'] == stats['chars_after']
+
+def test_settings_come_from_string_config_values():
+    assert get_compaction_settings({})['truncate_stale'] is False
+    parsed = get_compaction_settings({'prompt_compaction': 'False', 'compaction_truncate_stale': 'True',
+                                      'compaction_keep_recent_messages': '4'})
+    assert (parsed['enabled'], parsed['truncate_stale'], parsed['keep_recent_messages']) == (False, True, 4)
@@ -0,0 +1,119 @@
+import json
+
+from conftest import wait_for
+from modules.event_log import EventLog
+from modules import queue_journal
+from modules.queue_journal import QueueJournal
+from modules.task_queue import TaskScheduler
+
+def make_task(task_id, project='/work/a', priority=0):
+    return {'id': task_id, 'project_path': project, 'project_name': project.rsplit('/', 1)[-1],
+            'message': f"message {task_id}", 'priority': priority}
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_recover_returns_pending_and_in_flight_tasks(tmp_path):
+    path = str(tmp_path / 'queue.jsonl')
+    journal = QueueJournal(path, flush_interval=0)
+    for task_id in 'abcd':
+        journal.record_enqueue(make_task(task_id))
+    journal.record_start('a')
+    journal.record_start('b')
+    journal.record_done('b')
+    assert journal.flush()
+
+    pending, in_flight = QueueJournal(path).recover()
+    assert [task['id'] for task in in_flight] == ['a']
+    assert [task['id'] for task in pending] == ['c', 'd']
+
+def test_recover_compacts_the_journal_to_live_tasks(tmp_path):
+    path = str(tmp_path / 'queue.jsonl')
+    journal = QueueJournal(path, flush_interval=0)
+    journal.record_enqueue_many([make_task('a'), make_task('b')])
+    journal.record_start('a')
+    journal.record_done('b')
+    assert journal.flush()
+
+    QueueJournal(path).recover()
+    assert read_records(path) == [{'op': 'enqueue', 'task': make_task('a')}, {'op': 'start', 'id': 'a'}]
+
+def test_recover_skips_a_torn_final_line(tmp_path):
+    path = tmp_path / 'queue.jsonl'
+    path.write_text(json.dumps({'op': 'enqueue', 'task': make_task('a')}) + '\n' + '{"op": "enq', encoding='utf-8')
+
+    pending, in_flight = QueueJournal(str(path)).recover()
+    assert [task['id'] for task in pending] == ['a']
+    assert in_flight == []
+
+def test_recover_without_a_journal_file(tmp_path):
+    assert QueueJournal(str(tmp_path / 'missing.jsonl')).recover() == ([], [])
+
+def test_scheduler_recover_runs_interrupted_tasks_first(tmp_path):
+    path = str(tmp_path / 'queue.jsonl')
+    journal = QueueJournal(path, flush_interval=0)
+    for task_id in 'abc':
+        journal.record_enqueue(make_task(task_id, project=f"/work/{task_id}"))
+    journal.record_start('c')
+    assert journal.flush()
+
+    started = []
+    scheduler = TaskScheduler(started.append, journal=QueueJournal(path, flush_interval=0), events=EventLog())
+    assert scheduler.recover() == 3
+    assert wait_for(lambda: started)
+    assert started[0]['id'] == 'c'
+    assert started[0]['recovered'] is True
+
+    # The lane stays busy until the task reports back; then the next one starts
+    scheduler.mark_idle('/work/c')
+    assert wait_for(lambda: len(started) == 2)
+    assert started[1]['id'] == 'a'
+
+def test_finished_tasks_are_not_recovered_again(tmp_path):
+    path = str(tmp_path / 'queue.jsonl')
+    started = []
+    journal = QueueJournal(path, flush_interval=0)
+    scheduler = TaskScheduler(started.append, journal=journal, events=EventLog())
+    scheduler.enqueue(make_task('a', project='/work/a'))
+    scheduler.enqueue(make_task('b', project='/work/b'))
+    assert wait_for(lambda: started)
+    scheduler.mark_idle('/work/a')
+    assert wait_for(lambda: len(started) == 2)
+    assert journal.flush()
+
+    pending, in_flight = QueueJournal(path).recover()
+    assert pending == []
+    assert [task['id'] for task in in_flight] == ['b']
+
+def test_failed_writes_are_retried_and_flush_reports_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(queue_journal, 'WRITE_RETRY_SECONDS', 0.01)
+    directory = tmp_path / 'missing'
+    path = str(directory / 'queue.jsonl')
+    journal = QueueJournal(path, flush_interval=0)
+    journal.record_enqueue(make_task('a'))
+    assert not journal.flush(timeout=0.2)
+    assert journal.get_stats()['write_errors'] >= 1
+    assert journal.get_stats()['records'] == 0
+
+    directory.mkdir()
+    assert journal.flush()
+    assert [task['id'] for task in QueueJournal(path).recover()[0]] == ['a']
+
+def test_recover_skips_records_of_the_wrong_shape(tmp_path):
+    path = tmp_path / 'queue.jsonl'
+    lines = [[1, 2], 'text', {'op': 'enqueue'}, {'op': 'enqueue', 'task': 'a'}, {'op': 'start'},
+             {'op': 'enqueue', 'task': make_task('a')}, {'op': 'done', 'id': ['a']}]
+    path.write_text(''.join(json.dumps(line) + '\n' for line in lines), encoding='utf-8')
+
+    journal = QueueJournal(str(path))
+    pending, in_flight = journal.recover()
+    assert [task['id'] for task in pending] == ['a']
+    assert journal.get_stats()['skipped_lines'] == 6
+
+def test_unreadable_journal_starts_an_empty_queue(tmp_path):
+    path = tmp_path / 'queue.jsonl'
+    path.mkdir()
+    scheduler = TaskScheduler(lambda task: None, journal=QueueJournal(str(path)), events=EventLog())
+    assert scheduler.recover() == 0
+    assert scheduler.snapshot()[0] == []
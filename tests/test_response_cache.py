@@ -0,0 +1,51 @@
+import time
+
+from modules.response_cache import ResponseCache
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(enabled=False)
+    cache.put('key', 'text')
+    assert cache.get('key') is None
+    assert cache.get_stats()['entries'] == 0
+
+def test_hit_and_miss_are_counted():
+    cache = ResponseCache(enabled=True)
+    cache.put('key', 'text')
+    assert cache.get('key') == 'text'
+    assert cache.get('other') is None
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = ResponseCache(enabled=True, ttl_seconds=10)
+    cache.put('key', 'text')
+    now[0] += 11
+    assert cache.get('key') is None
+    assert cache.get_stats()['expired'] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(enabled=True, max_entries=2)
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    cache.get('a')
+    cache.put('c', 'C')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A' and cache.get('c') == 'C'
+
+def test_byte_budget_evicts_and_skips_oversized_responses():
+    cache = ResponseCache(enabled=True, max_bytes=10)
+    cache.put('big', 'x' * 11)
+    assert cache.get('big') is None
+    cache.put('a', 'x' * 6)
+    cache.put('b', 'y' * 6)
+    assert cache.get('a') is None and cache.get('b') == 'y' * 6
+    assert cache.get_stats()['bytes'] == 6
+
+def test_disabling_clears_the_cache():
+    cache = ResponseCache(enabled=True)
+    cache.put('key', 'text')
+    cache.configure(False, 600, 64, 1024)
+    cache.configure(True, 600, 64, 1024)
+    assert cache.get('key') is None
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from conftest import wait_for
+from modules.llm_backends import FakeBackend, ResponseStream
+from modules.response_cache import ResponseCache
+from modules.single_flight import SingleFlight
+
+def test_followers_attach_to_the_leaders_stream():
+    flight = SingleFlight()
+    stream = ResponseStream()
+    calls = []
+    def start():
+        calls.append(1)
+        return stream
+
+    leader, is_leader = flight.run('key', start)
+    follower, is_follower_leader = flight.run('key', start)
+    assert is_leader and not is_follower_leader
+    assert leader is follower is stream
+    assert len(calls) == 1
+
+def test_key_is_released_when_the_stream_closes():
+    flight = SingleFlight()
+    stream = ResponseStream()
+    flight.run('key', lambda: stream)
+    assert flight.get_stats()['in_flight'] == 1
+    stream.append("done")
+    stream.close()
+    assert flight.get_stats()['in_flight'] == 0
+
+    second, is_leader = flight.run('key', ResponseStream)
+    assert is_leader and second is not stream
+
+def test_leader_error_reaches_waiting_followers():
+    flight = SingleFlight()
+    entered = threading.Event()
+    release = threading.Event()
+    def start():
+        entered.set()
+        release.wait(5)
+        raise RuntimeError("backend down")
+
+    errors = []
+    def follow():
+        try:
+            flight.run('key', start)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=follow)
+    leader.start()
+    assert entered.wait(5)
+    follower = threading.Thread(target=follow)
+    follower.start()
+    assert wait_for(lambda: flight.get_stats()['followers'] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ["backend down", "backend down"]
+    assert flight.get_stats()['in_flight'] == 0
+
+def test_response_is_cached_before_the_key_is_released():
+    """A duplicate arriving at any moment finds either the in-flight run or the cached response."""
+    flight = SingleFlight()
+    cache = ResponseCache(enabled=True)
+    backend = FakeBackend(latency=0.01, min_interval=0)
+    in_flight_when_cached = []
+
+    def cache_response(response_stream):
+        in_flight_when_cached.append(flight.get_stats()['in_flight'])
+        cache.put('key', response_stream.text())
+
+    def start():
+        response_stream = backend.submit_stream("prompt", [])
+        # As in main.handle_llm_interaction: registered before single_flight's release callback
+        response_stream.add_done_callback(cache_response)
+        return response_stream
+
+    response_stream, is_leader = flight.run('key', start)
+    text = response_stream.result(5)
+    assert is_leader
+    assert wait_for(lambda: flight.get_stats()['in_flight'] == 0)
+    assert in_flight_when_cached == [1]
+    assert cache.get('key') == text
+
+def test_on_complete_runs_after_the_stream_closes():
+    backend = FakeBackend(latency=0, min_interval=0)
+    seen = []
+    response_stream = backend.submit_stream("prompt", [], on_complete=lambda s: seen.append((s.done, s.text())))
+    text = response_stream.result(5)
+    assert wait_for(lambda: seen)
+    assert seen == [(True, text)]
+
+def test_failed_run_is_not_cached():
+    class BrokenBackend(FakeBackend):
+        def stream(self, prompt, images, debug=False):
+            yield "partial"
+            raise RuntimeError("browser closed")
+
+    flight = SingleFlight()
+    cache = ResponseCache(enabled=True)
+    backend = BrokenBackend(latency=0, min_interval=0)
+    def start():
+        response_stream = backend.submit_stream("prompt", [])
+        response_stream.add_done_callback(lambda s: s.error is None and cache.put('key', s.text()))
+        return response_stream
+
+    response_stream, _ = flight.run('key', start)
+    with pytest.raises(RuntimeError):
+        response_stream.result(5)
+    assert wait_for(lambda: flight.get_stats()['in_flight'] == 0)
+    assert cache.get('key') is None
@@ -0,0 +1,165 @@
+import threading
+
+import pytest
+
+from conftest import wait_for
+from modules.event_log import EventLog
+from modules.task_queue import TaskScheduler, parse_affinity_window, parse_schedule
+
+def make_task(task_id, project, priority=0, **extra):
+    return dict({'id': task_id, 'project_path': project, 'project_name': project.rsplit('/', 1)[-1],
+                 'message': f"message {task_id}", 'priority': priority}, **extra)
+
+def event_types(events, task_id):
+    return [event['type'] for event in events.since(0)[0] if event['data'].get('task', {}).get('id') == task_id]
+
+def hold_runner(scheduler):
+    """Lets tests queue several tasks before any of them is dispatched."""
+    scheduler.mark_busy()
+
+def test_dispatches_the_next_task_when_the_lane_goes_idle():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog())
+    scheduler.enqueue(make_task('a', '/work/a'))
+    scheduler.enqueue(make_task('b', '/work/b'))
+    assert wait_for(lambda: started)
+    assert [task['id'] for task in started] == ['a']
+
+    scheduler.mark_idle('/work/a')
+    assert wait_for(lambda: len(started) == 2)
+    assert started[1]['id'] == 'b'
+    assert event_types(scheduler.events, 'a') == ['enqueue', 'start', 'complete']
+
+def test_higher_priority_runs_first():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog())
+    hold_runner(scheduler)
+    scheduler.enqueue(make_task('low', '/work/a'))
+    scheduler.enqueue(make_task('high', '/work/b', priority=5))
+    scheduler.mark_idle()
+    assert wait_for(lambda: started)
+    assert started[0]['id'] == 'high'
+
+def test_stalled_task_is_requeued_then_failed():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog(), timeout_seconds=0.1, quiet_seconds=0.05, max_attempts=2)
+    scheduler.enqueue(make_task('a', '/work/a'))
+
+    # No heartbeat: the watchdog gives the task up, runs it once more, then fails it
+    assert wait_for(lambda: event_types(scheduler.events, 'a')[-1:] == ['fail'])
+    assert [task['id'] for task in started] == ['a', 'a']
+    assert event_types(scheduler.events, 'a') == ['enqueue', 'start', 'requeue', 'start', 'fail']
+    stats = scheduler.get_stats()
+    assert stats['requeued'] == 1 and stats['failed'] == 1 and stats['stalled'] == 2
+    assert not scheduler.busy
+
+def test_heartbeats_keep_a_task_alive():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog(), timeout_seconds=0.2)
+    scheduler.enqueue(make_task('a', '/work/a'))
+    assert wait_for(lambda: started)
+    for _ in range(5):
+        threading.Event().wait(0.08)
+        scheduler.mark_busy('/work/a')
+    assert scheduler.get_stats()['stalled'] == 0
+    scheduler.mark_idle('/work/a')
+    assert wait_for(lambda: event_types(scheduler.events, 'a')[-1:] == ['complete'])
+
+def test_deadline_fails_a_task_once_it_goes_quiet():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog(), timeout_seconds=60, quiet_seconds=0.05, max_attempts=1)
+    scheduler.enqueue(make_task('a', '/work/a', deadline_seconds=0.1))
+    assert wait_for(lambda: event_types(scheduler.events, 'a')[-1:] == ['fail'])
+    assert scheduler.get_stats()['deadline_exceeded'] == 1
+
+def test_cancel_removes_a_queued_task_and_retires_a_running_one():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog(), quiet_seconds=0.05)
+    scheduler.enqueue(make_task('a', '/work/a'))
+    scheduler.enqueue(make_task('b', '/work/b'))
+    assert wait_for(lambda: started)
+
+    assert scheduler.cancel('b') == 'removed'
+    assert scheduler.cancel('a') == 'cancelling'
+    assert scheduler.cancel('missing') is None
+    assert wait_for(lambda: event_types(scheduler.events, 'a')[-1:] == ['cancel'])
+    # Cancelled tasks are never requeued
+    assert [task['id'] for task in started] == ['a']
+    assert scheduler.snapshot()[0] == []
+
+def test_runner_error_requeues_the_task():
+    attempts = []
+    def runner(task):
+        attempts.append(task['id'])
+        if len(attempts) == 1:
+            raise RuntimeError("window did not open")
+    scheduler = TaskScheduler(runner, events=EventLog(), max_attempts=2)
+    scheduler.enqueue(make_task('a', '/work/a'))
+    assert wait_for(lambda: len(attempts) == 2)
+    assert event_types(scheduler.events, 'a') == ['enqueue', 'start', 'requeue', 'start']
+
+def test_lanes_run_different_projects_side_by_side():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog(), lanes=2)
+    scheduler.enqueue(make_task('a1', '/work/a'))
+    scheduler.enqueue(make_task('a2', '/work/a'))
+    scheduler.enqueue(make_task('b1', '/work/b'))
+    assert wait_for(lambda: len(started) == 2)
+    # Two lanes never drive the same project's window
+    assert sorted(task['id'] for task in started) == ['a1', 'b1']
+
+    queue, lanes, busy = scheduler.snapshot()
+    assert busy and [task['id'] for task in queue] == ['a2']
+    assert sorted(lane['task']['id'] for lane in lanes) == ['a1', 'b1']
+
+    scheduler.mark_idle('/work/b')
+    threading.Event().wait(0.05)
+    assert len(started) == 2
+    scheduler.mark_idle('/work/a')
+    assert wait_for(lambda: len(started) == 3)
+    assert started[2]['id'] == 'a2'
+
+def test_lane_events_carry_the_lane_index():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog(), lanes=2)
+    scheduler.enqueue(make_task('a', '/work/a'))
+    scheduler.enqueue(make_task('b', '/work/b'))
+    assert wait_for(lambda: len(started) == 2)
+    lanes = {event['data']['task']['id']: event['data']['lane'] for event in scheduler.events.since(0)[0] if event['type'] == 'start'}
+    assert sorted(lanes.values()) == [0, 1]
+
+def test_enqueue_many_is_dispatched_after_all_tasks_are_queued():
+    started = []
+    scheduler = TaskScheduler(started.append, events=EventLog())
+    scheduler.enqueue_many([make_task('a', '/work/a'), make_task('b', '/work/b', priority=1)])
+    assert wait_for(lambda: started)
+    assert started[0]['id'] == 'b'
+
+@pytest.mark.parametrize('data, expected', [
+    ({}, (0, None)),
+    ({'priority': '3', 'deadline_minutes': '1.5'}, (3, 90)),
+    ({'priority': None, 'deadline_minutes': ''}, (0, None)),
+])
+def test_parse_schedule(data, expected):
+    assert parse_schedule(data) == expected
+
+@pytest.mark.parametrize('data', [
+    {'priority': 'high'},
+    {'priority': [1]},
+    {'deadline_minutes': 'soon'},
+    {'deadline_minutes': 0},
+    {'deadline_minutes': -5},
+    {'deadline_minutes': 'nan'},
+])
+def test_parse_schedule_rejects_bad_values(data):
+    with pytest.raises(ValueError):
+        parse_schedule(data)
+
+def test_parse_affinity_window():
+    assert parse_affinity_window({}) == 3
+    assert parse_affinity_window({'affinity_window': '5'}) == 5
+
+@pytest.mark.parametrize('value', ['wide', None, [2], 0, -1])
+def test_parse_affinity_window_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        parse_affinity_window({'affinity_window': value})